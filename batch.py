@@ -0,0 +1,47 @@
+import json
+import os
+
+# Manifest for grading several sections and workshops in one run
+# (grade_java_projects.py --batch manifest.json). Sections map workshop
+# numbers to the GitHub Classroom assignment ID of that workshop; null means
+# the Classroom CSV already on disk is used:
+#
+#   {
+#     "sections": {
+#       "5": {"3": "123456", "4": "123457"},
+#       "6": {"3": "123458", "4": null}
+#     }
+#   }
+#
+# The same structure can be written in YAML (.yaml/.yml) when PyYAML is installed.
+
+class ManifestError(Exception):
+    pass
+
+def load_manifest(path):
+    """Returns the (section, workshop, assignment ID or None) jobs of a manifest, in file order."""
+    with open(path, "r", encoding="utf-8") as f:
+        if os.path.splitext(path)[1].lower() in (".yaml", ".yml"):
+            try:
+                import yaml  # optional, and only imported for YAML manifests
+            except ImportError:
+                raise ManifestError("YAML manifests need PyYAML (pip install pyyaml), or use JSON.")
+            data = yaml.safe_load(f)
+        else:
+            data = json.load(f)
+
+    sections = data.get("sections") if isinstance(data, dict) else None
+    if not isinstance(sections, dict) or not sections:
+        raise ManifestError(f"{path}: expected a 'sections' mapping of section -> {{workshop: assignment ID}}.")
+    jobs = []
+    for section, workshops in sections.items():
+        if not isinstance(workshops, dict):
+            raise ManifestError(f"{path}: section {section} must map workshop numbers to assignment IDs.")
+        for workshop, assignment_id in workshops.items():
+            try:
+                workshop = int(workshop)
+            except (TypeError, ValueError):
+                raise ManifestError(f"{path}: '{workshop}' in section {section} is not a workshop number.")
+            assignment = None if assignment_id is None else str(assignment_id).strip() or None
+            jobs.append((str(section).strip().upper(), workshop, assignment))
+    return jobs
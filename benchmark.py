@@ -0,0 +1,218 @@
+"""
+Offline benchmark for the grading pipeline.
+
+Generates synthetic student repositories for a workshop from workshop_inputs.json
+as local bare git repos, builds matching submissions and results workbooks,
+runs the full grader non-interactively against file:// URLs and reports
+throughput and per-phase latency for several roster sizes.
+
+    python benchmark.py --workshop 3 --sizes 10 30 60
+    python benchmark.py --sizes 20 -- --jobs 4 --no-grade-cache
+
+Arguments after `--` are passed to grade_java_projects.main().
+"""
+import argparse
+import contextlib
+import json
+import os
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+# The grader reads these in load_config(), see main() below
+os.environ.setdefault("STUDENT_SUBMISSIONS", "submissions.xlsx")
+os.environ.setdefault("STUDENT_RESULTS", "results.xlsx")
+
+import pandas as pd
+import grade_java_projects as grader
+
+SECTION = "B"
+
+# Share of each kind of submission in the generated roster
+VARIANT_WEIGHTS = {
+    "correct": 40,
+    "partial": 15,
+    "non_compiling": 10,
+    "infinite_loop": 5,
+    "huge_output": 5,
+    "packaged": 15,
+    "multi_file": 10,
+}
+
+READ_INPUT = """        java.io.ByteArrayOutputStream buffer = new java.io.ByteArrayOutputStream();
+        byte[] chunk = new byte[4096];
+        int n;
+        while ((n = System.in.read(chunk)) > 0) {
+            buffer.write(chunk, 0, n);
+        }
+        String input = new String(buffer.toByteArray(), "UTF-8");
+"""
+
+def java_string(text):
+    # JSON string escapes are valid Java string escapes
+    return json.dumps(text)
+
+def answers_method(tests):
+    """A static method returning the expected output for each known test input."""
+    lines = ["    static String answer(String input) {"]
+    for test in tests:
+        lines.append(f"        if (input.equals({java_string(test['input'])})) return {java_string(test.get('expected') or '')};")
+    lines.append('        return "Unknown input";')
+    lines.append("    }")
+    return "\n".join(lines)
+
+def main_class_source(body, tests, package=None, class_name="Main", extra=""):
+    header = f"package {package};\n\n" if package else ""
+    return (f"{header}public class {class_name} {{\n"
+            f"    public static void main(String[] args) throws Exception {{\n{READ_INPUT}{body}    }}\n\n"
+            f"{answers_method(tests) if tests is not None else ''}{extra}\n}}\n")
+
+def submission_files(variant, tests, student_id):
+    """Relative path -> source for one synthetic submission."""
+    stamp = f"// Submission of student {student_id}\n"
+    print_answer = "        System.out.println(answer(input));\n"
+    if variant == "correct":
+        return {"Main.java": stamp + main_class_source(print_answer, tests)}
+    if variant == "partial":
+        return {"Main.java": stamp + main_class_source(print_answer, tests[: max(1, len(tests) // 2)])}
+    if variant == "non_compiling":
+        return {"Main.java": stamp + main_class_source("        System.out.println(answer(input))\n", tests)}
+    if variant == "infinite_loop":
+        return {"Main.java": stamp + main_class_source("        while (input != null) { input.hashCode(); }\n", tests)}
+    if variant == "huge_output":
+        body = ("        for (int i = 0; i < 2000000; i++) System.out.println(\"debug line \" + i);\n"
+                + print_answer)
+        return {"Main.java": stamp + main_class_source(body, tests)}
+    if variant == "packaged":
+        return {os.path.join("src", "com", "student", "Main.java"):
+                stamp + main_class_source(print_answer, tests, package="com.student")}
+    if variant == "multi_file":
+        helper = f"public class Answers {{\n{answers_method(tests)}\n}}\n"
+        body = "        System.out.println(Answers.answer(input));\n"
+        return {"Main.java": stamp + main_class_source(body, None),
+                "Answers.java": stamp + helper}
+    raise ValueError(f"Unknown variant: {variant}")
+
+def git(args, cwd):
+    env = dict(os.environ, GIT_AUTHOR_DATE="2024-01-01T00:00:00Z", GIT_COMMITTER_DATE="2024-01-01T00:00:00Z")
+    subprocess.run(["git", "-c", "user.name=Student", "-c", "user.email=student@example.com"] + args,
+                   cwd=cwd, env=env, check=True, capture_output=True)
+
+def create_repos(base_dir, count, tests, seed):
+    """Creates `count` bare repos under base_dir. Returns [(student name, file:// URL, variant)]."""
+    rng = random.Random(seed)
+    variants = rng.choices(list(VARIANT_WEIGHTS), weights=list(VARIANT_WEIGHTS.values()), k=count)
+    students = []
+    for i, variant in enumerate(variants, start=1):
+        work = os.path.join(base_dir, "work", f"student_{i:04d}")
+        bare = os.path.join(base_dir, "repos", f"student_{i:04d}.git")
+        for rel_path, source in submission_files(variant, tests, i).items():
+            path = os.path.join(work, rel_path)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path, "w", encoding="utf-8") as f:
+                f.write(source)
+        git(["init", "-q", "-b", "main", work], base_dir)
+        git(["add", "."], work)
+        git(["commit", "-q", "-m", "Submission"], work)
+        git(["clone", "-q", "--bare", work, bare], base_dir)
+        students.append((f"STUDENT {i:04d}", "file://" + os.path.abspath(bare), variant))
+    return students
+
+def write_workbooks(run_dir, students, workshop):
+    submissions = os.path.join(run_dir, "submissions.xlsx")
+    results = os.path.join(run_dir, "results.xlsx")
+    pd.DataFrame({
+        grader.STUDENT_NAME_COLUMN: [name for name, _, _ in students],
+        f"Workshop {workshop} Repo URL": [url for _, url, _ in students],
+    }).to_excel(submissions, sheet_name=f"L2C{SECTION}", index=False)
+    pd.DataFrame({grader.STUDENT_NAME_COLUMN: [name for name, _, _ in students]}).to_excel(
+        results, sheet_name=f"L2C{SECTION}", index=False)
+    return submissions, results
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))]
+
+def run_size(base_dir, students, workshop, grader_args, cache_dir):
+    run_dir = tempfile.mkdtemp(prefix=f"run_{len(students)}_", dir=base_dir)
+    grader.STUDENT_SUBMISSIONS, grader.STUDENT_RESULTS = write_workbooks(run_dir, students, workshop)
+    grader.CLASSROOM_DIR = run_dir
+    grader.CACHE_DIR = cache_dir or os.path.join(run_dir, "cache")
+    grader.GRADING_JOURNAL = os.path.join(run_dir, "journal.sqlite3")
+    profile_path = os.path.join(run_dir, "profile.json")
+
+    args = ["--section", SECTION, "--workshop", str(workshop), "--skip-download",
+            "--profile", profile_path] + grader_args
+    start = time.perf_counter()
+    with open(os.path.join(run_dir, "grader.log"), "w", encoding="utf-8") as log_file:
+        with contextlib.redirect_stdout(log_file):
+            grader.main(args)
+    wall = time.perf_counter() - start
+
+    with open(profile_path, "r", encoding="utf-8") as f:
+        profile = json.load(f)
+    phases = {}
+    for entry in profile["phases"] + [e for s in profile["students"] for e in s["phases"]]:
+        phases.setdefault(entry["phase"], []).append(entry["wall"])
+    statuses = pd.read_excel(grader.STUDENT_RESULTS, sheet_name=f"L2C{SECTION}")[f"Workshop {workshop} Status"]
+    return {
+        "students": len(students),
+        "wall": round(wall, 3),
+        "throughput": round(len(students) / wall, 3),
+        "phases": {name: {"count": len(v), "p50": round(statistics.median(v), 4),
+                          "p95": round(percentile(v, 95), 4), "max": round(max(v), 4)}
+                   for name, v in phases.items()},
+        "statuses": statuses.value_counts().to_dict(),
+        "run_dir": run_dir,
+    }
+
+def print_report(report):
+    print(f"\n=== {report['students']} students: {report['wall']:.1f}s, {report['throughput']:.2f} students/s ===")
+    print(f"  statuses: {report['statuses']}")
+    print(f"  {'phase':<20}{'count':>7}{'p50 ms':>10}{'p95 ms':>10}{'max ms':>10}")
+    for name, stats in sorted(report["phases"].items(), key=lambda kv: -kv[1]["p50"] * kv[1]["count"]):
+        print(f"  {name:<20}{stats['count']:>7}{stats['p50'] * 1000:>10.1f}"
+              f"{stats['p95'] * 1000:>10.1f}{stats['max'] * 1000:>10.1f}")
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    grader_args = []
+    if "--" in argv:
+        split = argv.index("--")
+        argv, grader_args = argv[:split], argv[split + 1:]
+
+    parser = argparse.ArgumentParser(description="Offline benchmark of the grading pipeline.")
+    parser.add_argument("--workshop", type=int, default=3, help="workshop from workshop_inputs.json (default: 3)")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10, 30, 60], help="roster sizes to benchmark")
+    parser.add_argument("--timeout", type=int, default=5, help="PROGRAM_TIMEOUT for the run in seconds (default: 5)")
+    parser.add_argument("--seed", type=int, default=1, help="seed for the mix of submissions")
+    parser.add_argument("--warm", action="store_true", help="share caches across roster sizes instead of starting cold")
+    parser.add_argument("--keep", metavar="DIR", help="generate everything in DIR and keep it")
+    parser.add_argument("--output", metavar="PATH", help="also write the report as JSON")
+    args = parser.parse_args(argv)
+
+    grader.load_config()  # before the settings below are changed for the run
+    tests = grader.WORKSHOP_TESTS[str(args.workshop)]["tests"]
+    grader.PROGRAM_TIMEOUT = args.timeout
+    base_dir = args.keep or tempfile.mkdtemp(prefix="grader_bench_")
+    os.makedirs(base_dir, exist_ok=True)
+    print(f"Generating {max(args.sizes)} repositories for workshop {args.workshop} in {base_dir}...")
+    students = create_repos(base_dir, max(args.sizes), tests, args.seed)
+    cache_dir = os.path.join(base_dir, "cache") if args.warm else None
+
+    reports = []
+    for size in args.sizes:
+        report = run_size(base_dir, students[:size], args.workshop, grader_args, cache_dir)
+        print_report(report)
+        reports.append(report)
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump({"workshop": args.workshop, "grader_args": grader_args, "runs": reports}, f, indent=2)
+        print(f"\nReport written to {args.output}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+import hashlib
+import json
+import os
+import shutil
+import statistics
+import subprocess
+import tempfile
+import time
+
+from executor import run_streaming
+from java_harness import java_version
+
+# Per-test time limits measured on a workshop's reference solution.
+# The reference is compiled once and every test is run on it a few times;
+# the median wall time of each test (JVM start included) is its baseline.
+# Baselines are cached per reference sources, tests and JDK:
+#
+#   <cache dir>/<key>.json   {"baselines": [seconds or null, ...]}
+
+def _key(java_files, reference_dir, tests, java_command):
+    digest = hashlib.sha256()
+    for path in sorted(java_files):
+        digest.update(os.path.relpath(path, reference_dir).replace(os.sep, "/").encode("utf-8") + b"\0")
+        with open(path, "rb") as f:
+            digest.update(f.read())
+    spec = [{k: v for k, v in test.items() if k != "timeout"} for test in tests]
+    digest.update(json.dumps(spec, sort_keys=True, ensure_ascii=False).encode("utf-8"))
+    digest.update(f"{java_version()} {' '.join(java_command('.'))}".encode("utf-8"))
+    return digest.hexdigest()[:32]
+
+def measure_baselines(reference_dir, java_files, tests, cache_dir, java_command, timeout, runs=3):
+    """
+    Runs the tests on the reference solution. java_command(class_dir) gives
+    the command that starts the reference's main class.
+    Returns the median wall time in seconds per test, with None for a test
+    the reference fails or times out on, or None if it doesn't compile.
+    """
+    cache_path = os.path.join(cache_dir, _key(java_files, reference_dir, tests, java_command) + ".json")
+    if os.path.exists(cache_path):
+        with open(cache_path, "r", encoding="utf-8") as f:
+            return json.load(f)["baselines"]
+
+    class_dir = tempfile.mkdtemp(prefix="reference_")
+    try:
+        try:
+            compiled = subprocess.run(["javac", "-d", class_dir] + java_files,
+                                      capture_output=True, text=True, timeout=timeout)
+        except (OSError, subprocess.TimeoutExpired):
+            return None
+        if compiled.returncode != 0:
+            print(f"⚠️ Reference solution in {reference_dir} did not compile.\n{compiled.stderr}")
+            return None
+
+        baselines = []
+        for test in tests:
+            times = []
+            for _ in range(runs):
+                start = time.perf_counter()
+                result = run_streaming(java_command(class_dir), class_dir, test["input"], timeout)
+                elapsed = time.perf_counter() - start
+                if result == "Timeout" or result.returncode != 0 \
+                        or (test.get("expected") or "") not in (result.stdout + result.stderr):
+                    times = None
+                    break
+                times.append(elapsed)
+            baselines.append(round(statistics.median(times), 4) if times else None)
+    finally:
+        shutil.rmtree(class_dir, ignore_errors=True)
+
+    os.makedirs(cache_dir, exist_ok=True)
+    with open(cache_path, "w", encoding="utf-8") as f:
+        json.dump({"baselines": baselines}, f)
+    return baselines
+
+def timeouts_from_baselines(baselines, multiplier, minimum, maximum):
+    """Time limit per test: multiplier times its baseline, kept within [minimum, maximum]."""
+    return [maximum if baseline is None else round(min(maximum, max(minimum, multiplier * baseline)), 2)
+            for baseline in baselines]
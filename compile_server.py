@@ -0,0 +1,104 @@
+import base64
+import itertools
+import subprocess
+import threading
+
+# Client for harness/CompileServer.java: one warm JVM running javax.tools.JavaCompiler
+# that compiles submissions for all grading workers. If the server dies, compile()
+# returns None and the grader falls back to plain javac.
+
+def _encode(text):
+    return base64.b64encode(text.encode("utf-8")).decode("ascii")
+
+class CompileServer:
+    def __init__(self, class_dir, threads):
+        self.class_dir = class_dir
+        self.threads = threads
+        self.process = None
+        self._ids = itertools.count(1)
+        self._pending = {}
+        self._lock = threading.Lock()
+        self._write_lock = threading.Lock()
+        self._ready = threading.Event()
+
+    @property
+    def alive(self):
+        return self.process is not None and self.process.poll() is None
+
+    def start(self, timeout):
+        """Starts the server JVM. Returns True once it is ready for requests."""
+        try:
+            self.process = subprocess.Popen(
+                ["java", "-cp", self.class_dir, "CompileServer", str(self.threads)],
+                stdin=subprocess.PIPE,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.DEVNULL,
+                text=True,
+                encoding="utf-8",
+                bufsize=1
+            )
+        except OSError:
+            return False
+        threading.Thread(target=self._read_responses, daemon=True).start()
+        return self._ready.wait(timeout) and self.alive
+
+    def _read_responses(self):
+        for line in self.process.stdout:
+            parts = line.split()
+            if parts[:1] == ["@@READY"]:
+                self._ready.set()
+            elif len(parts) == 4 and parts[0] == "@@DONE":
+                diagnostics = "" if parts[3] == "-" else base64.b64decode(parts[3]).decode("utf-8", "replace")
+                with self._lock:
+                    waiter = self._pending.pop(parts[1], None)
+                if waiter is not None:
+                    waiter[1].append((int(parts[2]), diagnostics))
+                    waiter[0].set()
+        # The server is gone: release everyone still waiting so they fall back to javac.
+        self._ready.set()
+        with self._lock:
+            waiters, self._pending = list(self._pending.values()), {}
+        for event, _ in waiters:
+            event.set()
+
+    def compile(self, working_dir, output_dir, source_files, timeout):
+        """
+        Compiles source_files (relative to working_dir) into output_dir.
+        Returns a subprocess.CompletedProcess with the diagnostics in stderr,
+        "Timeout", or None if the server is not running.
+        """
+        if not self.alive:
+            return None
+        request_id = str(next(self._ids))
+        event, response = threading.Event(), []
+        with self._lock:
+            self._pending[request_id] = (event, response)
+        fields = [request_id, working_dir, output_dir] + list(source_files)
+        try:
+            with self._write_lock:
+                self.process.stdin.write("\t".join(_encode(f) for f in fields) + "\n")
+                self.process.stdin.flush()
+        except (OSError, ValueError):
+            with self._lock:
+                self._pending.pop(request_id, None)
+            return None
+
+        if not event.wait(timeout):
+            with self._lock:
+                self._pending.pop(request_id, None)
+            return "Timeout"
+        if not response:
+            return None
+        returncode, diagnostics = response[0]
+        return subprocess.CompletedProcess(["javac", "-d", output_dir] + list(source_files), returncode, "", diagnostics)
+
+    def stop(self):
+        if self.process is not None:
+            try:
+                self.process.stdin.close()
+            except OSError:
+                pass
+            try:
+                self.process.wait(timeout=5)
+            except subprocess.TimeoutExpired:
+                self.process.kill()
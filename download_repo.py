@@ -1,63 +1,161 @@
 import requests
 import csv
+import hashlib
+import json
 import os
 import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import parse_qs, urlparse
+from requests.adapters import HTTPAdapter
 from dotenv import load_dotenv
 
 load_dotenv()
 
-def fetch_assignment_grades(assignment_id, token):
+GITHUB_API_URL = os.getenv("GITHUB_API_URL", "https://api.github.com")
+REQUEST_TIMEOUT = 30  # seconds per request
+MAX_RETRIES = 5  # for rate limits and server errors
+MAX_PARALLEL_PAGES = 8
+# ETags and bodies of previous responses, so unchanged rosters come back as 304
+HTTP_CACHE_DIR = os.path.join(os.path.expanduser(os.getenv("GRADER_CACHE_DIR", "~/.cache/workshop-grader")), "http")
+
+_session = None
+_session_lock = threading.Lock()
+
+def get_session():
+    """Shared session so all requests reuse pooled connections."""
+    global _session
+    with _session_lock:
+        if _session is None:
+            _session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=MAX_PARALLEL_PAGES, pool_maxsize=MAX_PARALLEL_PAGES)
+            _session.mount("https://", adapter)
+            _session.mount("http://", adapter)
+        return _session
+
+def _cache_file(url, params, token):
+    # Responses depend on who is asking, so the token is part of the key.
+    key = json.dumps([url, sorted(params.items()), hashlib.sha256(token.encode("utf-8")).hexdigest()])
+    return os.path.join(HTTP_CACHE_DIR, hashlib.sha256(key.encode("utf-8")).hexdigest() + ".json")
+
+def _load_cached(path):
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+def _store_cached(path, etag, body, link):
+    os.makedirs(HTTP_CACHE_DIR, exist_ok=True)
+    tmp_path = f"{path}.{threading.get_ident()}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump({"etag": etag, "body": body, "link": link}, f)
+    os.replace(tmp_path, path)
+
+def _retry_delay(resp, attempt):
+    """Seconds to wait before retrying resp, or None if it should not be retried."""
+    if resp.status_code in (403, 429):
+        if "Retry-After" in resp.headers:
+            return float(resp.headers["Retry-After"])
+        if resp.headers.get("X-RateLimit-Remaining") == "0" and "X-RateLimit-Reset" in resp.headers:
+            return max(0.0, float(resp.headers["X-RateLimit-Reset"]) - time.time()) + 1
+        if resp.status_code == 429:
+            return 2 ** attempt
+        return None  # a real permission problem
+    if resp.status_code >= 500:
+        return 2 ** attempt
+    return None
+
+def get_page(url, params, headers, token):
+    """
+    Conditional GET for one page of results.
+    Returns (page data, Link header). Unchanged pages come back as 304 and
+    are served from the local cache. Rate limits and server errors are
+    retried with backoff; other errors raise requests.HTTPError.
+    """
+    cache_path = _cache_file(url, params, token)
+    cached = _load_cached(cache_path)
+    request_headers = dict(headers)
+    if cached and cached.get("etag"):
+        request_headers["If-None-Match"] = cached["etag"]
+
+    for attempt in range(MAX_RETRIES + 1):
+        resp = get_session().get(url, headers=request_headers, params=params, timeout=REQUEST_TIMEOUT)
+        if resp.status_code == 304 and cached:
+            return cached["body"], cached.get("link", "")
+        delay = _retry_delay(resp, attempt)
+        if delay is None or attempt == MAX_RETRIES:
+            break
+        print(f"[WARN] GitHub returned {resp.status_code}, retrying in {delay:.0f}s...")
+        time.sleep(delay)
+
+    resp.raise_for_status()
+    page_data = resp.json()
+    link = resp.headers.get("Link", "")
+    if resp.headers.get("ETag"):
+        _store_cached(cache_path, resp.headers["ETag"], page_data, link)
+    return page_data, link
+
+def _page_number(link_url):
+    pages = parse_qs(urlparse(link_url).query).get("page")
+    return int(pages[0]) if pages else None
+
+def fetch_assignment_grades(assignment_id, token, base=None):
     """
     Fetch grades for a given GitHub Classroom assignment.
     Returns a list of grade dicts.
+    The first page tells us how many pages there are (Link header), the
+    rest are fetched concurrently over a pooled session.
     """
-    base = "https://api.github.com"
+    base = base or GITHUB_API_URL
     endpoint = f"/assignments/{assignment_id}/grades"
-    url = base + endpoint
+    url = base.rstrip("/") + endpoint
     headers = {
         "Authorization": f"Bearer {token}",
         "Accept": "application/vnd.github+json",
         "X-GitHub-Api-Version": "2022-11-28"
     }
-    all_grades = []
-    params = {
-        "per_page": 100,
-        "page": 1
-    }
-    while True:
-        try:
-            resp = requests.get(url, headers=headers, params=params)
-            resp.raise_for_status()  # raises HTTPError for bad responses
-            if resp.status_code != 200:
-                print(f"Error {resp.status_code}")
-                print(f"Incorrect assignment id: {assignment_id} provided or check your GITHUB_TOKEN permissions.")
-                print(f"Please verify assignment id: {assignment_id} using cmd -> gh classroom assignment")
-                sys.exit(1)
-            page_data = resp.json()
-            if not isinstance(page_data, list):
-                print("Unexpected data format:", page_data)
-                sys.exit(1)
-            if not page_data:
-                break
-            all_grades.extend(page_data)
-
-            if "Link" in resp.headers:
-                links = resp.headers["Link"]
-                # Simple check for 'rel="next"'
-                if 'rel="next"' in links:
-                    params["page"] += 1
-                    continue
-            break
-        except ConnectionError as e:
-            print(f"[ERROR] Could not connect to {url}. Reason: {e}")
-            return []  # or None, depending on your logic
-        except requests.Timeout:
-            print(f"[ERROR] Request to {url} timed out.")
-            return []
-        except requests.RequestException as e:
-            print(f"[ERROR] Request failed...Connect to Internet")
-            return []   
-    return all_grades
+    per_page = 100
+    try:
+        first_page, link = get_page(url, {"per_page": per_page, "page": 1}, headers, token)
+        if not isinstance(first_page, list):
+            print("Unexpected data format:", first_page)
+            sys.exit(1)
+        all_grades = list(first_page)
+        links = requests.utils.parse_header_links(link) if link else []
+        links = {l.get("rel"): l.get("url") for l in links}
+
+        last_page = _page_number(links["last"]) if "last" in links else None
+        if last_page and last_page > 1:
+            pages = range(2, last_page + 1)
+            with ThreadPoolExecutor(max_workers=min(MAX_PARALLEL_PAGES, len(pages))) as pool:
+                results = pool.map(lambda page: get_page(url, {"per_page": per_page, "page": page}, headers, token)[0], pages)
+                for page_data in results:
+                    all_grades.extend(page_data)
+        elif "next" in links:
+            # No "last" link: follow "next" one page at a time.
+            page = 1
+            while "next" in links and first_page:
+                page += 1
+                first_page, link = get_page(url, {"per_page": per_page, "page": page}, headers, token)
+                all_grades.extend(first_page)
+                links = {l.get("rel"): l.get("url") for l in requests.utils.parse_header_links(link)} if link else {}
+        return all_grades
+    except requests.HTTPError as e:
+        print(f"Error {e.response.status_code}")
+        print(f"Incorrect assignment id: {assignment_id} provided or check your GITHUB_TOKEN permissions.")
+        print(f"Please verify assignment id: {assignment_id} using cmd -> gh classroom assignment")
+        return []
+    except requests.ConnectionError as e:
+        print(f"[ERROR] Could not connect to {url}. Reason: {e}")
+        return []  # or None, depending on your logic
+    except requests.Timeout:
+        print(f"[ERROR] Request to {url} timed out.")
+        return []
+    except requests.RequestException as e:
+        print(f"[ERROR] Request failed...Connect to Internet")
+        return []
 
 def save_grades_to_csv(grades, section, workshop_number):
     """
@@ -84,14 +182,16 @@ def save_grades_to_csv(grades, section, workshop_number):
         print(f"Please create the section directory L2C{section} or check the CLASSROOM_DIR environment variable.")
         sys.exit(1)
 
-def start_download(section, workshop):
+def start_download(section, workshop, assignment_id=None):
     token = os.getenv("GITHUB_TOKEN")
     if not token:
         print("Please set the environment variable GITHUB_TOKEN to your GitHub PAT or fine-grained token.")
         sys.exit(1)
 
     # Take assignment ID and CSV path from user input
-    assignment_id = input("Enter the assignment ID: ").strip()
+    if not assignment_id:
+        assignment_id = input("Enter the assignment ID: ")
+    assignment_id = str(assignment_id).strip()
     try:
         grades = fetch_assignment_grades(assignment_id, token)
         save_grades_to_csv(grades, section, workshop)
@@ -0,0 +1,140 @@
+import os
+import signal
+import subprocess
+import threading
+
+import profiling
+
+# Streaming process runner for student programs.
+# Output is read incrementally into buffers capped at max_output bytes, so a
+# program printing in an endless loop can't fill the grader's memory. When an
+# expected string is given, the process is stopped as soon as it shows up in
+# stdout or stderr, or as soon as the output cap is hit, instead of waiting for
+# the timeout.
+
+class StreamResult(subprocess.CompletedProcess):
+    """CompletedProcess plus why the process was stopped early, if it was."""
+
+    def __init__(self, args, returncode, stdout, stderr, stopped=None, truncated=False):
+        super().__init__(args, returncode, stdout, stderr)
+        self.stopped = stopped  # None, or "match"/"output_limit" if it was killed early
+        self.truncated = truncated
+
+class _Capture:
+    def __init__(self, max_output, expected, settle):
+        self.data = bytearray()
+        self.truncated = False
+        self.matched = False
+        self.max_output = max_output
+        self.expected = expected
+        self.settle = settle
+
+    def read_from(self, stream):
+        while True:
+            chunk = stream.read1(65536) if hasattr(stream, "read1") else stream.read(65536)
+            if not chunk:
+                break
+            if self.truncated:
+                continue  # keep draining so the child doesn't block on a full pipe
+            room = self.max_output - len(self.data)
+            start = max(0, len(self.data) - len(self.expected)) if self.expected else 0
+            self.data += chunk[:room]
+            if self.expected and not self.matched and self.data.find(self.expected, start) != -1:
+                self.matched = True
+                self.settle("match")
+            if len(chunk) > room:
+                self.truncated = True
+                self.settle("output_limit")
+        stream.close()
+
+def _wait(process):
+    """
+    Waits for the process. Returns its (CPU seconds, peak RSS in MB) where
+    the OS reports them for a single child, otherwise None.
+    """
+    if hasattr(os, "wait4"):
+        try:
+            _, status, usage = os.wait4(process.pid, 0)
+        except ChildProcessError:
+            process.wait()
+            return None
+        process.returncode = os.waitstatus_to_exitcode(status)
+        rss_mb = usage.ru_maxrss / 1024 if os.uname().sysname != "Darwin" else usage.ru_maxrss / (1024 * 1024)
+        return usage.ru_utime + usage.ru_stime, rss_mb
+    process.wait()
+    return None
+
+def _kill(process):
+    if hasattr(os, "killpg"):
+        try:
+            os.killpg(process.pid, signal.SIGKILL)
+            return
+        except OSError:
+            pass
+    process.kill()
+
+def run_streaming(command, working_dir, input_data=None, timeout=None, max_output=1024 * 1024, expected=None):
+    """
+    Runs command, feeding input_data to its stdin. Resource limits are
+    applied by wrapping the command (see sandbox.Limits.applied).
+    Returns a StreamResult, or "Timeout" if it ran out of time before the
+    result was settled. Raises FileNotFoundError like subprocess.run.
+    """
+    # In its own process group on POSIX, so anything it spawned is killed with it.
+    process = subprocess.Popen(command, cwd=working_dir, stdin=subprocess.PIPE,
+                               stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+                               start_new_session=hasattr(os, "killpg"))
+    wake = threading.Event()
+    reason = []
+
+    def settle(why):
+        if not reason:
+            reason.append(why)
+        wake.set()
+
+    expected_bytes = expected.encode("utf-8") if expected else None
+    captures = [_Capture(max_output, expected_bytes, settle) for _ in range(2)]
+    threads = [
+        threading.Thread(target=captures[0].read_from, args=(process.stdout,), daemon=True),
+        threading.Thread(target=captures[1].read_from, args=(process.stderr,), daemon=True),
+    ]
+
+    def feed_stdin():
+        try:
+            if input_data:
+                process.stdin.write(input_data.encode("utf-8"))
+            process.stdin.close()
+        except (BrokenPipeError, OSError):
+            pass  # the program exited without reading all of its input
+
+    # Reap the process on its own thread so the main thread can wait on one event.
+    usage = []
+
+    def reap():
+        usage.append(_wait(process))
+        wake.set()
+
+    threads.append(threading.Thread(target=feed_stdin, daemon=True))
+    for thread in threads:
+        thread.start()
+    reaper = threading.Thread(target=reap, daemon=True)
+    reaper.start()
+
+    # Wakes up when the process exits or the verdict is settled early.
+    finished = wake.wait(timeout)
+    stopped = None
+    if process.returncode is None:
+        stopped = reason[0] if reason else None
+    # Also when it exited by itself, so nothing it started in the background outlives it
+    _kill(process)
+    reaper.join(5)
+    for thread in threads:
+        thread.join(5)
+    if usage and usage[0] is not None:
+        profiling.record_child(*usage[0])
+    if not finished:
+        return "Timeout"
+
+    stdout, stderr = (c.data.decode("utf-8", "replace") for c in captures)
+    return StreamResult(command, process.returncode, stdout, stderr, stopped=stopped,
+                        truncated=any(c.truncated for c in captures))
@@ -0,0 +1,109 @@
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import time
+
+from repo_cache import evict_lru
+
+# Content-addressed cache for compiled classes and grading results.
+# Submissions are keyed by a hash of their .java sources, so byte-identical
+# submissions (e.g. untouched starter repos) are compiled and graded once.
+#
+#   <cache dir>/<source key>/classes/...   compiled .class files
+#   <cache dir>/<result key>/result.json   status and details for a test spec
+
+def source_key(clone_path, java_files):
+    """Hash of the .java sources, including their paths inside the repo. Unreadable files are left out."""
+    digest = hashlib.sha256()
+    for path in sorted(java_files, key=lambda p: os.path.relpath(p, clone_path)):
+        try:
+            with open(path, "rb") as f:
+                data = f.read()
+        except OSError:
+            continue  # e.g. a broken symlink, which the scanner skips as well
+        digest.update(os.path.relpath(path, clone_path).replace(os.sep, "/").encode("utf-8") + b"\0")
+        digest.update(data)
+        digest.update(b"\0")
+    return digest.hexdigest()
+
+def result_key(src_key, tests, main_class=None):
+    """
+    Hash of the sources together with the workshop's test spec (time limits
+    left out) and the main class it asks for, which decides the class tested.
+    """
+    spec = json.dumps({"main_class": main_class,
+                       "tests": [{k: v for k, v in test.items() if k != "timeout"} for test in tests]},
+                      sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256((src_key + "\0" + spec).encode("utf-8")).hexdigest()
+
+class GradeCache:
+    def __init__(self, cache_dir, max_bytes):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        os.makedirs(cache_dir, exist_ok=True)
+
+    def _entry(self, key):
+        return os.path.join(self.cache_dir, key)
+
+    def _touch(self, path):
+        try:
+            os.utime(path, (time.time(), time.time()))
+        except OSError:
+            pass
+
+    def get_result(self, key):
+        """Returns the cached (status, details) for key, or None."""
+        entry = self._entry(key)
+        try:
+            with open(os.path.join(entry, "result.json"), "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return None
+        self._touch(entry)
+        return data["status"], data["details"]
+
+    def put_result(self, key, status, details):
+        entry = self._entry(key)
+        os.makedirs(entry, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=entry, suffix=".tmp")
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump({"status": status, "details": details}, f, ensure_ascii=False)
+        os.replace(tmp_path, os.path.join(entry, "result.json"))
+
+    def restore_classes(self, key, clone_path):
+        """Copies cached .class files into clone_path. Returns True on a hit."""
+        entry = self._entry(key)
+        classes = os.path.join(entry, "classes")
+        if not os.path.isdir(classes):
+            return False
+        shutil.copytree(classes, clone_path, dirs_exist_ok=True)
+        self._touch(entry)
+        return True
+
+    def store_classes(self, key, clone_path):
+        """Saves the .class files produced by compiling clone_path."""
+        entry = self._entry(key)
+        classes = os.path.join(entry, "classes")
+        if os.path.isdir(classes):
+            return
+        os.makedirs(entry, exist_ok=True)
+        staging = tempfile.mkdtemp(dir=entry)
+        for root, dirs, files in os.walk(clone_path):
+            dirs[:] = [d for d in dirs if d != ".git"]
+            for fname in files:
+                if fname.endswith(".class"):
+                    src = os.path.join(root, fname)
+                    dest = os.path.join(staging, os.path.relpath(src, clone_path))
+                    os.makedirs(os.path.dirname(dest), exist_ok=True)
+                    shutil.copy2(src, dest)
+        try:
+            os.replace(staging, classes)
+        except OSError:
+            # Another worker stored the same sources first.
+            shutil.rmtree(staging, ignore_errors=True)
+
+    def evict(self):
+        """Evicts least recently used entries beyond the size cap."""
+        return evict_lru(self.cache_dir, self.max_bytes)
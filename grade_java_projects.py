@@ -1,226 +1,404 @@
-import pandas as pd
 import os
 import subprocess
 import shutil
 import tempfile
-import re
-import json
-from openpyxl import load_workbook
-from openpyxl.worksheet.datavalidation import DataValidation
-from openpyxl.styles import Font, Alignment, Border, Side
-from openpyxl.utils import get_column_letter
-from dotenv import load_dotenv
-from download_repo import start_download
-
-load_dotenv()
+import argparse
+import socket
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from repo_cache import RepoCache
+from java_harness import build_harness, run_in_harness
+from grade_cache import GradeCache, result_key, source_key
+from compile_server import CompileServer
+from grading_journal import GradingJournal
+import profiling
+from profiling import phase
+from executor import run_streaming
+from sandbox import CpuBudget, Limits, classify_violation
+from jvm_startup import fast_start_profile
+from calibration import measure_baselines, timeouts_from_baselines
+from source_scan import SKIP_DIRS, is_ambiguous, scan_sources
+from batch import ManifestError, load_manifest
+from watch import ChangeTracker
+from work_queue import WorkQueue
+from lazy_import import LazyModule
+from test_plan import TestPlanError, load_plan, read_plan
+
+# Loaded on first use, so quick commands don't import pandas, openpyxl, numpy or requests
+pd = LazyModule("pandas")
+download_repo = LazyModule("download_repo")
+results_writer = LazyModule("results_writer")
+roster = LazyModule("roster")
+similarity = LazyModule("similarity")
+
 # work with different sheets for submissions and results
 # section wise in the tabs in sheet
 # work in onedrive sheets, get details from tab -> sections {choose the tab name}
 
-# --- CONFIGURATION ---
-# IMPORTANT: Update these values in env to match your setup
-
-# 1. Path to your Excel file in your local OneDrive folder
-# STUDENT_SUBMISSIONS = "C:/Users/YourUsername/OneDrive/StudentProjects.xlsx" # Example for Windows
-STUDENT_SUBMISSIONS = os.path.expanduser(os.getenv("STUDENT_SUBMISSIONS")) # Example for Mac/Linux
-STUDENT_RESULTS = os.path.expanduser(os.getenv("STUDENT_RESULTS"))
-CLASSROOM_DIR = os.getenv("CLASSROOM_DIR", ".")
 STUDENT_NAME_COLUMN = "Student Name"
-PROGRAM_TIMEOUT = 15 # A shorter timeout is fine for simple programs
-
-# NEW: Input to provide to the Java program's standard input.
-# Use '\n' to simulate the user pressing the Enter key.
-# set the input based on the question for different assignments
+PROGRAM_TIMEOUT = 15 # Longest a single test may run; a reference solution gives shorter limits
+# Longest error message or program output written to the results and console
+MAX_DETAIL_CHARS = 2000
+# Number of students graded at the same time (clone, compile and tests run in parallel)
+DEFAULT_JOBS = os.cpu_count() or 1
 
-with open("workshop_inputs.json", "r", encoding="utf-8") as f:
-    WORKSHOP_TESTS = json.load(f)
-# --- END OF CONFIGURATION ---
+_config_loaded = False
 
-def find_file(directory, filename):
-    for root, dirs, files in os.walk(directory):
-        if filename in files:
-            return os.path.join(root, filename)
-    return None
-
-def add_dropdown_to_status_column(file_path, sheet_name, workshop_number):
+def load_config():
     """
-    Adds a dropdown list to the specified status column in the given sheet.
-    Dropdown options: ["⛔Absent", "❌Incomplete", "⚠️Partial Complete", "✅Complete"]
+    Loads .env into the environment and reads the settings below from it.
+    main() calls it first; code that drives the grader from Python (see
+    benchmark.py) calls it before changing any settings. Only the first call
+    reads anything.
     """
-    try:
-        status_column_index = workshop_number + 1  # Column B is 2, C is 3, etc.
-        status_column_letter = get_column_letter(status_column_index)
-        # Load the workbook and sheet
-        workbook = load_workbook(file_path)
-        if sheet_name not in workbook.sheetnames:
-            print(f"Error: Sheet '{sheet_name}' not found in workbook.")
-            return
-        sheet = workbook[sheet_name]
-
-        # Create a data validation object for dropdown
-        dropdown = DataValidation(type="list", formula1='"⛔Absent,❌Incomplete,⚠️Partial Complete,✅Complete"', allow_blank=True)
-        sheet.add_data_validation(dropdown)
-
-        # Apply the dropdown to the entire column
-        for row in range(2, sheet.max_row + 1):  # Start from row 2 to skip the header
-            cell = sheet[f"{status_column_letter}{row}"]
-            dropdown.add(cell)
-
-        # Save the workbook
-        workbook.save(file_path)
-        print(f"Dropdown added successfully to column '{status_column_letter}' in sheet '{sheet_name}'.")
-    except Exception as e:
-        print(f"Error adding dropdown: {e}")
+    global _config_loaded, STUDENT_SUBMISSIONS, STUDENT_RESULTS, CLASSROOM_DIR, CLONE_TIMEOUT, COMPILE_TIMEOUT
+    global TIMEOUT_MULTIPLIER, MIN_TEST_TIMEOUT, TIMEOUT_BACKOFF, MAX_TIMEOUTS, MAX_OUTPUT_BYTES
+    global CPU_LIMIT_SECONDS, MEMORY_LIMIT_MB, MAX_PROCESSES, MAX_FILE_MB, JVM_HEAP_MB, CPU_BUDGET
+    global JVM_PROFILE, CACHE_DIR, REPO_CACHE_MAX_MB, GRADE_CACHE_MAX_MB, GRADING_JOURNAL, WATCH_INTERVAL
+    global WATCH_DEBOUNCE, WORK_LEASE_SECONDS, TEST_RUNNER, SIMILARITY_THRESHOLD, MAIN_CANDIDATES
+    global WORKSHOP_INPUTS
+    if _config_loaded:
+        return
+    _config_loaded = True
+    from dotenv import load_dotenv
+    load_dotenv()
 
-def format_results_sheet(file_path, sheet_name):
-    """Format all cells: font size 16, centered, bordered. Header row bold."""
-    try:
-        wb = load_workbook(file_path)
-        if sheet_name not in wb.sheetnames:
-            print(f"⚠️ Sheet '{sheet_name}' not found in workbook.")
-            return
-        ws = wb[sheet_name]
-
-        # Styles
-        font = Font(size=16)
-        bold_font = Font(size=16, bold=True)
-        align = Alignment(horizontal="center", vertical="center", wrap_text=False)
-        thin_border = Border(
-            left=Side(style="thin"),
-            right=Side(style="thin"),
-            top=Side(style="thin"),
-            bottom=Side(style="thin")
-        )
-
-        for row_idx, row in enumerate(ws.iter_rows(), start=1):
-            for cell in row:
-                # Bold header row
-                if row_idx == 1:
-                    cell.font = bold_font
-                else:
-                    cell.font = font
-                cell.alignment = align
-                cell.border = thin_border
-                
-        for col in ws.columns:
-            max_length = 0
-            col_letter = col[0].column_letter
-            for cell in col:
-                if cell.value:
-                    max_length = max(max_length, len(str(cell.value)))
-            ws.column_dimensions[col_letter].width = max_length
-            
-        wb.save(file_path)
-        print(f"Formatted '{sheet_name}' in '{file_path}' successfully.")
-    except Exception as e:
-        print(f"Error formatting sheet: {e}")
+    # --- CONFIGURATION ---
+    # IMPORTANT: Update these values in env to match your setup
 
-def update_master_with_classroom(master_file, classroom_file, workshop_number, sheet_name):
-    """
-    Update the Student Submissions sheet with a new GitHub Classroom assignment export.
-    """
-    try:
-        df_master = pd.read_excel(master_file, sheet_name=sheet_name)
-        df_classroom = pd.read_csv(classroom_file)
+    # 1. Path to your Excel file in your local OneDrive folder
+    # STUDENT_SUBMISSIONS = "C:/Users/YourUsername/OneDrive/StudentProjects.xlsx" # Example for Windows
+    # Unset paths are None; commands that need the workbooks check for them (see missing_config)
+    STUDENT_SUBMISSIONS = os.getenv("STUDENT_SUBMISSIONS") and os.path.expanduser(os.getenv("STUDENT_SUBMISSIONS")) # Example for Mac/Linux
+    STUDENT_RESULTS = os.getenv("STUDENT_RESULTS") and os.path.expanduser(os.getenv("STUDENT_RESULTS"))
+    CLASSROOM_DIR = os.getenv("CLASSROOM_DIR", ".")
+    CLONE_TIMEOUT = int(os.getenv("CLONE_TIMEOUT", "60")) # git clone/fetch of one repository
+    COMPILE_TIMEOUT = int(os.getenv("COMPILE_TIMEOUT", "30")) # javac for one submission
+    # With a reference solution, each test may run TIMEOUT_MULTIPLIER times its time on the reference
+    TIMEOUT_MULTIPLIER = float(os.getenv("TIMEOUT_MULTIPLIER", "5"))
+    MIN_TEST_TIMEOUT = float(os.getenv("MIN_TEST_TIMEOUT", "2"))
+    # After a test times out the remaining tests get this share of their limit,
+    # and after MAX_TIMEOUTS timeouts the rest of a student's tests are skipped
+    TIMEOUT_BACKOFF = float(os.getenv("TIMEOUT_BACKOFF", "0.25"))
+    MAX_TIMEOUTS = int(os.getenv("MAX_TIMEOUTS", "2"))
+    # Output kept per stream of a student program; runaway output beyond this is dropped
+    MAX_OUTPUT_BYTES = int(os.getenv("MAX_OUTPUT_BYTES", str(1024 * 1024)))
+    # Resource limits for student programs (0 turns a limit off); need Linux/macOS
+    CPU_LIMIT_SECONDS = int(os.getenv("CPU_LIMIT_SECONDS", "0")) # 0 = twice PROGRAM_TIMEOUT
+    MEMORY_LIMIT_MB = int(os.getenv("MEMORY_LIMIT_MB", "2048")) # address space per process
+    MAX_PROCESSES = int(os.getenv("MAX_PROCESSES", "256")) # processes and threads per test run
+    MAX_FILE_MB = int(os.getenv("MAX_FILE_MB", "64")) # largest file a program may write
+    JVM_HEAP_MB = int(os.getenv("JVM_HEAP_MB", "256"))
+    CPU_BUDGET = int(os.getenv("CPU_BUDGET", "0")) # CPUs student programs are pinned to, 0 = all
+    # "fast" starts JVMs with a shared class archive, C1 only and the serial GC; "default" uses plain java/javac
+    JVM_PROFILE = os.getenv("JVM_PROFILE", "fast")
+    # Local cache for downloaded data such as mirrors of student repositories
+    CACHE_DIR = os.path.expanduser(os.getenv("GRADER_CACHE_DIR", "~/.cache/workshop-grader"))
+    REPO_CACHE_MAX_MB = int(os.getenv("REPO_CACHE_MAX_MB", "2048"))
+    GRADE_CACHE_MAX_MB = int(os.getenv("GRADE_CACHE_MAX_MB", "512"))
+    # SQLite journal recording every graded student as soon as they finish
+    GRADING_JOURNAL = os.path.expanduser(os.getenv("GRADING_JOURNAL", os.path.join(CACHE_DIR, "journal.sqlite3")))
+    # Watch mode: seconds between roster polls, and how long a new HEAD must stay unchanged before grading
+    WATCH_INTERVAL = int(os.getenv("WATCH_INTERVAL", "60"))
+    WATCH_DEBOUNCE = int(os.getenv("WATCH_DEBOUNCE", "20"))
+    # Distributed grading: how long a worker holds a job without a heartbeat before it is handed out again
+    WORK_LEASE_SECONDS = int(os.getenv("WORK_LEASE_SECONDS", "120"))
+    # "harness" runs all tests of a student in one JVM, "process" starts a JVM per test
+    TEST_RUNNER = os.getenv("TEST_RUNNER", "harness")
+    # With --similarity, pairs of submissions at least this similar (0-1) are reported
+    SIMILARITY_THRESHOLD = float(os.getenv("SIMILARITY_THRESHOLD", "0.8"))
+    # When several classes have a main method and none clearly ranks first, the tests
+    # run with this many of the best ranked ones in parallel and the best result counts
+    MAIN_CANDIDATES = int(os.getenv("MAIN_CANDIDATES", "2"))
 
-        df_classroom = df_classroom.rename(columns={
-            "roster_identifier": "Student Name",
-            "student_repository_url": "Repo URL"
-        })[["Student Name", "Repo URL"]]
+    # NEW: Input to provide to the Java program's standard input.
+    # Use '\n' to simulate the user pressing the Enter key.
+    # set the input based on the question for different assignments
+    # The file is validated and compiled into a cached test plan on first use (see workshop_tests)
+    WORKSHOP_INPUTS = os.path.expanduser(os.getenv(
+        "WORKSHOP_INPUTS", os.path.join(os.path.dirname(os.path.abspath(__file__)), "workshop_inputs.json")))
+    # --- END OF CONFIGURATION ---
 
-        # Normalize student names (case + strip spaces) for consistent merge
-        df_master["Student Name"] = df_master["Student Name"].str.strip().str.upper()
-        df_classroom["Student Name"] = df_classroom["Student Name"].str.strip().str.upper()
+FINAL_STATUS = {
+    "Absent": "⛔Absent",
+    "Git Clone Error": "❌Incomplete",
+    "Compile Error": "❌Incomplete",
+    "Runtime Error": "⚠️Partial Complete",
+    "CPU Limit Exceeded": "⚠️Partial Complete",
+    "Memory Limit Exceeded": "⚠️Partial Complete",
+    "Process Limit Exceeded": "⚠️Partial Complete",
+    "File Size Limit Exceeded": "⚠️Partial Complete",
+    "Incomplete": "❌Incomplete",
+    "Partial Complete": "⚠️Partial Complete",
+    "✅Complete": "✅Complete"
+}
 
-        df_classroom = df_classroom[df_classroom["Student Name"].isin(df_master["Student Name"])]
+# Each grading worker collects its console output here so that students
+# running in parallel don't interleave; main() prints it in roster order.
+_worker_log = threading.local()
 
-        workshop_col = f"Workshop {workshop_number} Repo URL"
-        
-        if workshop_col not in df_master.columns:
-            df_master[workshop_col] = None
+_test_plan = None
+
+def workshop_tests():
+    """The test plan of WORKSHOP_INPUTS, {workshop number: workshop}. Raises TestPlanError if it is invalid."""
+    global _test_plan
+    if _test_plan is None:
+        _test_plan = load_plan(WORKSHOP_INPUTS, os.path.join(CACHE_DIR, "test_plans"))
+    return _test_plan
+
+def __getattr__(name):
+    # WORKSHOP_TESTS used to be loaded at import time; it is now read when first used
+    if name == "WORKSHOP_TESTS":
+        return workshop_tests()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+def missing_config():
+    """Required settings that aren't set in the environment or .env."""
+    return [name for name in ("STUDENT_SUBMISSIONS", "STUDENT_RESULTS") if not globals()[name]]
+
+def log(message=""):
+    """Print a message, or buffer it when called from a grading worker."""
+    buffer = getattr(_worker_log, "lines", None)
+    if buffer is None:
+        print(message)
+    else:
+        buffer.append(str(message))
 
-        df_master = df_master.merge(df_classroom, on="Student Name", how="outer")
+# Set by main(); None means every student is cloned from scratch.
+repo_cache = None
+# Set by main(); None means identical submissions are compiled and graded again.
+grade_cache = None
+# Set by main(); every graded student is appended to it.
+journal = None
+# Set by main() with --similarity; None means no fingerprints are taken.
+fingerprints = None
+_cpu_budget = None
+_limits_lock = threading.Lock()
 
-        df_master[workshop_col] = df_master["Repo URL"].combine_first(df_master[workshop_col])
+def get_limits():
+    """Resource limits applied to student programs."""
+    return Limits(CPU_LIMIT_SECONDS or 2 * PROGRAM_TIMEOUT, MEMORY_LIMIT_MB, MAX_PROCESSES, MAX_FILE_MB, JVM_HEAP_MB)
 
-        df_master = df_master.drop(columns=["Repo URL"])
+def get_cpu_budget():
+    global _cpu_budget
+    with _limits_lock:
+        if _cpu_budget is None:
+            _cpu_budget = CpuBudget(CPU_BUDGET or None)
+        return _cpu_budget
 
-        with pd.ExcelWriter(master_file, engine="openpyxl", mode="a", if_sheet_exists="replace") as writer:
-            df_master.to_excel(writer, sheet_name=sheet_name, index=False)
+# Set by main() in --compile-server mode; None means every student runs javac.
+compile_server = None
+_java_helpers = None
+_java_helpers_lock = threading.Lock()
 
-        print(f"✅ Updated '{master_file}' with Classroom CSV for Workshop {workshop_number} in sheet '{sheet_name}'.")
+def get_java_helpers():
+    """Directory with the compiled Java helpers from harness/, or None if they can't be built."""
+    global _java_helpers
+    with _java_helpers_lock:
+        if _java_helpers is None:
+            _java_helpers = build_harness(CACHE_DIR, COMPILE_TIMEOUT) or ""
+        return _java_helpers or None
+
+def get_jvm_flags():
+    """(java flags, javac flags) of the JVM launch profile."""
+    if JVM_PROFILE != "fast":
+        return [], []
+    return fast_start_profile(CACHE_DIR, get_java_helpers(), COMPILE_TIMEOUT)
+
+def student_classpath(clone_path):
+    """Class path for running a student's program, matching the shared class archive if there is one."""
+    java_flags, _ = get_jvm_flags()
+    if java_flags and get_java_helpers():
+        # The archive only applies when the class path starts with the harness directory.
+        return get_java_helpers() + os.pathsep + clone_path
+    return clone_path
+
+def get_harness_dir():
+    """Compiled test harness classes, or None when tests run as separate processes."""
+    return get_java_helpers() if TEST_RUNNER == "harness" else None
+
+def start_compile_server(threads):
+    """Starts the shared compile server. Returns it, or None to keep using javac."""
+    class_dir = get_java_helpers()
+    if class_dir is None:
+        return None
+    server = CompileServer(class_dir, threads)
+    if not server.start(COMPILE_TIMEOUT):
+        print("⚠️ Compile server did not start, compiling with javac instead.")
+        server.stop()
+        return None
+    print("Compile server started.")
+    return server
+
+def update_master_with_classroom(updater, classroom_file, workshop_number, sheet_name):
+    """
+    Writes the repo URLs of a GitHub Classroom assignment export into the
+    Student Submissions sheet, and reports students that don't match a row.
+    """
+    try:
+        df_classroom = pd.read_csv(classroom_file)
+        result = updater.update(sheet_name, f"Workshop {workshop_number} Repo URL", df_classroom)
+        print(f"✅ Updated {result.changed} repo URL(s) in '{sheet_name}' from the Classroom CSV "
+              f"for Workshop {workshop_number}.")
+        for identifier, name in result.fuzzy:
+            print(f"  ⚠️ Matched Classroom student '{identifier}' to '{name}' by a close name.")
+        if result.unmatched:
+            print(f"  ⚠️ {len(result.unmatched)} Classroom student(s) not in '{sheet_name}': "
+                  + ", ".join(result.unmatched))
+        if result.duplicates:
+            print(f"  ⚠️ Duplicate student(s) in '{sheet_name}' or the CSV, only the first was updated: "
+                  + ", ".join(str(name) for name in result.duplicates))
     except Exception as e:
         print(f"❌ Error updating master submissions: {e}")
 
-        
-def run_command(command, working_dir, input_data=None):
+def shorten(text, limit=MAX_DETAIL_CHARS):
+    """Cuts text down to limit characters, noting how much was dropped."""
+    if text is None or len(text) <= limit:
+        return text
+    return text[:limit] + f"\n... [{len(text) - limit} more characters truncated]"
+
+def run_command(command, working_dir, input_data=None, expected=None, limits=None, timeout=None):
     """
     Runs a command, optionally providing input data to its stdin.
-    Returns its status and output.
+    Returns its status and output, or "Timeout" after timeout seconds
+    (default PROGRAM_TIMEOUT).
+    Output is streamed and capped at MAX_OUTPUT_BYTES per stream. With an
+    expected string the process is stopped as soon as the output contains
+    it or the cap is reached (see executor.run_streaming).
+    With limits (a sandbox.Limits) the process runs under those resource
+    limits, pinned to a CPU from the CPU budget.
     """
+    timeout = timeout or PROGRAM_TIMEOUT
     try:
-        result = subprocess.run(
-            command,
-            cwd=working_dir,
-            check=False,
-            capture_output=True,
-            text=True,
-            timeout=PROGRAM_TIMEOUT,
-            input=input_data # Pass input to the process
-        )
-        return result
+        if limits is None:
+            result = run_streaming(command, working_dir, input_data, timeout, MAX_OUTPUT_BYTES, expected)
+        else:
+            with get_cpu_budget().acquire() as cpus, limits.applied(cpus) as wrap:
+                result = run_streaming(wrap(command), working_dir, input_data, timeout, MAX_OUTPUT_BYTES, expected)
     except FileNotFoundError:
-        print(f"Error: Command '{command[0]}' not found. Is it in your system's PATH?")
+        log(f"Error: Command '{command[0]}' not found. Is it in your system's PATH?")
         return None
-    except subprocess.TimeoutExpired:
-        print(f"  Error: Command timed out after {PROGRAM_TIMEOUT} seconds.")
-        return "Timeout"
+    if result == "Timeout":
+        log(f"  Error: Command timed out after {timeout:g} seconds.")
+    return result
+
+def calibrate_tests(workshop, tests):
+    """
+    Tests of the workshop with a per-test "timeout" measured on its reference
+    solution ("reference" in workshop_inputs.json). Tests that set their own
+    timeout keep it; without a reference every test gets PROGRAM_TIMEOUT.
+    """
+    reference_dir = workshop_tests().get(str(workshop), {}).get("reference")
+    if not reference_dir:
+        return tests
+    java_files, candidates = scan_sources(reference_dir, workshop_tests()[str(workshop)].get("main_class"))
+    main_class = candidates[0].class_name if candidates else None
+    if main_class is None:
+        print(f"⚠️ No reference solution with a main method in '{reference_dir}', using {PROGRAM_TIMEOUT}s per test.")
+        return tests
+
+    java_flags = get_limits().jvm_flags() + get_jvm_flags()[0]
 
-def detect_main_class(java_files):
-    """Detect the main class with package if present."""
-    for file in java_files:
-        with open(file, "r", encoding="utf-8") as f:
-            content = f.read()
+    def java_command(class_dir):
+        return ["java"] + java_flags + ["-cp", student_classpath(class_dir), main_class]
 
-            if re.search(r'public\s+static\s+void\s+main\s*\(\s*String\s*\[\]\s*\w+\)', content):
-                class_name = os.path.splitext(os.path.basename(file))[0]
+    with phase("calibrate"):
+        baselines = measure_baselines(reference_dir, java_files, tests, os.path.join(CACHE_DIR, "calibration"),
+                                      java_command, PROGRAM_TIMEOUT)
+    if baselines is None:
+        print(f"⚠️ Could not run the reference solution, using {PROGRAM_TIMEOUT}s per test.")
+        return tests
 
-                # Check for package declaration
-                package_match = re.search(r'package\s+([\w\.]+);', content)
-                if package_match:
-                    return package_match.group(1) + "." + class_name
-                else:
-                    return class_name
-    return None
+    timeouts = timeouts_from_baselines(baselines, TIMEOUT_MULTIPLIER, MIN_TEST_TIMEOUT, PROGRAM_TIMEOUT)
+    calibrated = []
+    for i, (test, baseline, limit) in enumerate(zip(tests, baselines, timeouts), start=1):
+        if baseline is None:
+            print(f"⚠️ Reference solution fails test {i}, keeping {PROGRAM_TIMEOUT}s for it.")
+        calibrated.append(test if "timeout" in test else dict(test, timeout=limit))
+    print("Test time limits from the reference solution: "
+          + ", ".join(f"{test['timeout']:g}s" for test in calibrated))
+    return calibrated
 
-def run_tests(clone_path, main_class, tests):
+def run_tests(clone_path, main_class, tests, report=None):
     """
     Runs multiple test cases for a compiled Java program.
-    Each test contains 'input' and optionally 'expected'.
+    Each test contains 'input' and optionally 'expected' and 'timeout'.
     Returns final status and detailed results.
+    If a report dict is given, report["timed_out"] is set when a test timed out,
+    report["violation"] when one hit a resource limit, and report["passed"]
+    receives the number of passed tests.
     """
     results_summary = []
     passed_count = 0
+    violations = []
+    timeouts = 0
+    limits = get_limits()
+
+    # Run as many tests as possible in one JVM; anything the harness could not
+    # finish (timeouts, System.exit) falls back to one process per test.
+    harness_dir = get_harness_dir()
+    harness_results = []
+    if harness_dir:
+        with phase("test_harness", test=len(tests)), get_cpu_budget().acquire() as cpus, \
+                limits.applied(cpus) as wrap:
+            harness_results = run_in_harness(harness_dir, clone_path, main_class, tests, PROGRAM_TIMEOUT,
+                                             MAX_OUTPUT_BYTES, limits.jvm_flags() + get_jvm_flags()[0], wrap)
 
     for i, test in enumerate(tests, start=1):
-        print(f"  Running test case {i}...")
+        # A program that keeps timing out would otherwise take the full limit on every test.
+        if timeouts >= MAX_TIMEOUTS:
+            results_summary.append(f"Test {i}: Skipped ❌ (stopped after {timeouts} timeouts)")
+            log(results_summary[-1])
+            continue
+        log(f"  Running test case {i}...")
         input_data = test["input"]
         expected = test.get("expected")
+        timeout = test.get("timeout", PROGRAM_TIMEOUT)
+        if timeouts:
+            timeout *= TIMEOUT_BACKOFF
 
-        run_command_list = ["java", "-cp", clone_path, main_class]
-        run_result = run_command(run_command_list, clone_path, input_data)
+        if i <= len(harness_results):
+            run_result = harness_results[i - 1]
+        else:
+            run_command_list = (["java"] + limits.jvm_flags() + get_jvm_flags()[0]
+                                + ["-cp", student_classpath(clone_path), main_class])
+            with phase("test", test=i):
+                run_result = run_command(run_command_list, clone_path, input_data, expected, limits, timeout)
 
         if run_result == "Timeout":
-            results_summary.append(f"Test {i}: Timeout ❌")
-            print(results_summary[-1])
+            timeouts += 1
+            if report is not None:
+                report["timed_out"] = True
+            results_summary.append(f"Test {i}: Timeout ❌ (limit {timeout:g}s)")
+            log(results_summary[-1])
+            continue
+        stopped = getattr(run_result, "stopped", None)
+        if stopped == "output_limit":
+            results_summary.append(f"Test {i}: Output limit exceeded ❌ (more than {MAX_OUTPUT_BYTES} bytes)")
+            log(results_summary[-1])
             continue
-        if run_result is None or run_result.returncode != 0:
-            error_message = run_result.stderr if run_result else "Java command failed"
+        # A program stopped because its output already matched needs no exit code.
+        violation = None
+        if run_result is not None and run_result.returncode != 0 and stopped != "match":
+            violation = classify_violation(run_result.returncode, run_result.stderr)
+        if violation is not None:
+            violations.append(violation)
+            if report is not None:
+                report["violation"] = True
+            results_summary.append(f"Test {i}: {violation} ❌ -> {shorten(run_result.stderr)}")
+            log(results_summary[-1])
+            continue
+        if run_result is None or (run_result.returncode != 0 and stopped != "match"):
+            error_message = shorten(run_result.stderr) if run_result else "Java command failed"
             results_summary.append(f"Test {i}: Runtime Error ❌ -> {error_message}")
-            print(results_summary[-1])
+            log(results_summary[-1])
             continue
 
         program_output = (run_result.stdout + run_result.stderr).strip()
+        if stopped == "match":
+            log("  Expected output found, stopped the program early.")
 
         if expected:  # Compare expected vs actual
             if expected not in program_output:
@@ -228,14 +406,14 @@ def run_tests(clone_path, main_class, tests):
                     f"Test {i}: Failed ❌\n"
                     f"Input:\n{input_data}"
                     f"Expected: \n{expected}\n"
-                    f"Got:\n{program_output}\n"
+                    f"Got:\n{shorten(program_output)}\n"
                 )
             else:
                 results_summary.append(
                     f"Test {i}: Passed ✅\n"
                     f"Input:\n{input_data}"
                     f"Expected: \n{expected}\n"
-                    f"Got:\n{program_output}\n"
+                    f"Got:\n{shorten(program_output)}\n"
                 )
                 passed_count += 1
         else:  # No expected → just record output
@@ -243,200 +421,887 @@ def run_tests(clone_path, main_class, tests):
                 f"Test {i}: Output captured"
                 f"Input:\n{input_data}"
                 f"Expected:\n{expected}\n"
-                f"Got:\n{program_output}\n"
+                f"Got:\n{shorten(program_output)}\n"
             )
             passed_count += 1  # treat as pass if no expectation
 
-        print(results_summary[-1])  # print last test result
+        log(results_summary[-1])  # print last test result
         
     total_tests = len(tests)
-    
+    if report is not None:
+        report["passed"] = passed_count
+
     if passed_count == total_tests:
         return "✅Complete", f"Summary: {passed_count}/{total_tests} tests passed"
     elif passed_count > 0:
         return "Partial Complete", f"Summary: {passed_count}/{total_tests} tests passed"
+    elif violations:
+        return violations[0], f"Summary: {passed_count}/{total_tests} tests passed ({violations[0]})"
     else:
         return "Runtime Error", f"Summary: {passed_count}/{total_tests} tests passed"
 
     
-def process_student_repo(repo_url, tests):
+def remote_head(repo_url):
+    """Commit SHA of the remote HEAD, or None if it can't be determined."""
+    result = run_command(["git", "ls-remote", repo_url, "HEAD"], ".", timeout=CLONE_TIMEOUT)
+    if result is None or result == "Timeout" or result.returncode != 0 or not result.stdout.strip():
+        return None
+    return result.stdout.split()[0]
+
+def run_candidates(clone_path, main_classes, tests, report=None):
+    """
+    Runs the tests with each of the possible main classes in parallel and
+    keeps the result of the one that passed the most tests (the better
+    ranked one on a tie).
+    """
+    if len(main_classes) == 1:
+        return run_tests(clone_path, main_classes[0], tests, report)
+    record = profiling.current_record()
+
+    def attempt(main_class):
+        _worker_log.lines = []
+        attempt_report = {}
+        try:
+            with profiling.attach(record):
+                status, details = run_tests(clone_path, main_class, tests, attempt_report)
+            return status, details, attempt_report, _worker_log.lines
+        finally:
+            _worker_log.lines = None
+
+    with ThreadPoolExecutor(max_workers=len(main_classes)) as pool:
+        attempts = list(pool.map(attempt, main_classes))
+    best = max(range(len(attempts)), key=lambda i: (attempts[i][2].get("passed", 0), -i))
+    for main_class, (_, _, attempt_report, _) in zip(main_classes, attempts):
+        log(f"  Main class {main_class}: {attempt_report.get('passed', 0)}/{len(tests)} tests passed")
+    status, details, attempt_report, lines = attempts[best]
+    for line in lines:
+        log(line)
+    if report is not None:
+        report.update(attempt_report)
+        report["timed_out"] = any(a[2].get("timed_out") for a in attempts)
+        report["violation"] = any(a[2].get("violation") for a in attempts)
+    others = ", ".join(c for c in main_classes if c != main_classes[best])
+    return status, f"{details} with main class {main_classes[best]} (also tried {others})"
+
+def process_student_repo(repo_url, tests, report=None, expected_main=None):
     """
     Clones, compiles, and runs a student's Java project.
     Returns a status string and any relevant error messages.
+    If a report dict is given, it receives the graded "commit" SHA.
+    expected_main is the main class the workshop asks for, if it names one.
     """
+    if report is None:
+        report = {}
     if not repo_url or pd.isna(repo_url):
         return "Absent", "No repository URL provided."
 
     with tempfile.TemporaryDirectory() as temp_dir:
         clone_path = os.path.join(temp_dir, "repo")
-        print(f"  Cloning {repo_url}...")
+        log(f"  Cloning {repo_url}...")
 
-        clone_command = ["git", "clone", repo_url, clone_path]
-        clone_result = run_command(clone_command, temp_dir)
+        if repo_cache is not None:
+            with phase("clone"):
+                error_message = repo_cache.checkout(repo_url, clone_path)
+            if error_message == "Timeout":
+                return "Git Clone Error", "Git clone timed out."
+            if error_message is not None:
+                return "Git Clone Error", f"Failed to clone repo.\n{error_message}"
+        else:
+            clone_command = ["git", "clone", repo_url, clone_path]
+            with phase("clone"):
+                clone_result = run_command(clone_command, temp_dir, timeout=CLONE_TIMEOUT)
 
-        if clone_result == "Timeout":
-            return "Git Clone Error", "Git clone timed out."
-        if clone_result is None or clone_result.returncode != 0:
-            error_message = clone_result.stderr if clone_result else "Git command failed."
-            return "Git Clone Error", f"Failed to clone repo.\n{error_message}"
-        
-        # Look for .java files
-        java_files = []
-        for root, dirs, files in os.walk(clone_path):
-            for fname in files:
-                if fname.endswith(".java"):
-                    java_files.append(os.path.join(root, fname))
-        if not java_files:
-            return "Incomplete", "No .java files found in the repository."
-
-        main_class = detect_main_class(java_files)
-        print(f"  Detected main class: {main_class}")
-        if main_class is None:
-            return "Incomplete", "Could not find a class with a main method."
+            if clone_result == "Timeout":
+                return "Git Clone Error", "Git clone timed out."
+            if clone_result is None or clone_result.returncode != 0:
+                error_message = clone_result.stderr if clone_result else "Git command failed."
+                return "Git Clone Error", f"Failed to clone repo.\n{error_message}"
+
+        head = run_command(["git", "rev-parse", "HEAD"], clone_path)
+        if head is not None and head != "Timeout" and head.returncode == 0:
+            report["commit"] = head.stdout.strip()
+        return grade_checkout(clone_path, tests, report, expected_main)
+
+def grade_checkout(clone_path, tests, report, expected_main=None):
+    """
+    Finds the sources and main class of a checked out project, then compiles
+    and tests it (or reuses the result of an identical submission).
+    Returns a status string and any relevant error messages.
+    """
+    # Look for .java files and the classes with a main method
+    with phase("scan"):
+        java_files, candidates = scan_sources(clone_path, expected_main)
+    if not java_files:
+        return "Incomplete", "No .java files found in the repository."
+    src_key = None
+    if fingerprints is not None:
+        with phase("fingerprint"):
+            src_key = source_key(clone_path, java_files)
+            fingerprints.signature(src_key, java_files)
+            if report.get("commit"):
+                fingerprints.link(report["commit"], src_key)
+    if not candidates:
+        log("  Detected main class: None")
+        return "Incomplete", "Could not find a class with a main method."
+    if is_ambiguous(candidates):
+        main_classes = [c.class_name for c in candidates[:max(1, MAIN_CANDIDATES)]]
+        log(f"  Possible main classes: {', '.join(c.class_name for c in candidates)}")
+    else:
+        main_classes = [candidates[0].class_name]
+    log(f"  Detected main class: {main_classes[0]}")
+
+    if grade_cache is None:
+        return compile_and_test(clone_path, java_files, main_classes, tests, report)
+
+    with phase("cache_lookup"):
+        src_key = src_key or source_key(clone_path, java_files)
+        key = result_key(src_key, tests, expected_main)
+        cached = grade_cache.get_result(key)
+    if cached is not None:
+        log("  Identical submission already graded, reusing its result.")
+        return cached
+
+    status, details = compile_and_test(clone_path, java_files, main_classes, tests, report, src_key)
+    # Timeouts and resource limits depend on how busy the machine was (and on
+    # the limits configured), so don't remember them.
+    if not report.get("timed_out") and not report.get("violation"):
+        grade_cache.put_result(key, status, details)
+    return status, details
 
+def compile_and_test(clone_path, java_files, main_classes, tests, report=None, src_key=None):
+    """
+    Compiles the student's sources in place and runs the tests with each of
+    the possible main classes.
+    With a src_key, compiled classes are shared through the grade cache.
+    """
+    if src_key is not None and grade_cache.restore_classes(src_key, clone_path):
+        log("  Reusing compiled classes from an identical submission.")
+    else:
         # compile all java files from repo root so package structure is preserved
-        print(f"  Compiling Java files ({len(java_files)} files)...")
+        log(f"  Compiling Java files ({len(java_files)} files)...")
         relative_java_files = [os.path.relpath(f, clone_path) for f in java_files]
-        compile_command = ["javac", "-d", clone_path] + relative_java_files
-        compile_result = run_command(compile_command, clone_path)
+        with phase("compile"):
+            compile_result = None
+            if compile_server is not None:
+                compile_result = compile_server.compile(clone_path, clone_path, relative_java_files, COMPILE_TIMEOUT)
+            if compile_result is None:
+                compile_command = ["javac"] + get_jvm_flags()[1] + ["-d", clone_path] + relative_java_files
+                compile_result = run_command(compile_command, clone_path, timeout=COMPILE_TIMEOUT)
 
         if compile_result == "Timeout":
+            if report is not None:
+                report["timed_out"] = True
             return "Compile Error", "Compiler timed out."
         if compile_result is None or compile_result.returncode != 0:
             error_message = compile_result.stderr if compile_result else "Javac command failed."
             return "Compile Error", f"Code did not compile.\n{error_message}"
+        if src_key is not None:
+            grade_cache.store_classes(src_key, clone_path)
+
+    # --- run test cases ---
+    return run_candidates(clone_path, main_classes, tests, report)
+
+def already_graded(student_name, repo_url, workshop, section):
+    """The journal entry for the student's current remote commit, or None if it wasn't graded yet."""
+    if journal is None or not repo_url or pd.isna(repo_url):
+        return None
+    commit = remote_head(repo_url)
+    if commit is None:
+        return None
+    return journal.find(section, workshop, str(student_name), commit)
+
+def grade_submission(repo_url, tests, workshop):
+    """Grades one repository. Returns (status, final status, details, commit SHA or None)."""
+    report = {}
+    status, details = process_student_repo(repo_url, tests, report,
+                                           workshop_tests().get(str(workshop), {}).get("main_class"))
+    details = shorten(details)
+    return status, FINAL_STATUS.get(status.strip(), "Unknown Error"), details, report.get("commit")
+
+def grade_student(student_name, repo_url, tests, workshop, section=None, resume=False):
+    """
+    Grades one student and returns their results row together with the
+    console output produced while grading them.
+    With resume, a student whose current commit is already in the journal
+    for this section and workshop is not graded again. An unexpected error
+    while grading is recorded as "Unknown Error" instead of stopping the run.
+    """
+    _worker_log.lines = [f"\nProcessing {student_name}..."]
+    try:
+        with profiling.student(student_name, section=section, workshop=workshop):
+            previous = already_graded(student_name, repo_url, workshop, section) if resume else None
+            if previous is not None:
+                status, details, final_status = previous["status"], previous["details"], previous["final_status"]
+                log(f"  Commit {previous['commit_sha'][:10]} already graded, skipping.")
+            else:
+                started_at = time.time()
+                try:
+                    status, final_status, details, commit = grade_submission(repo_url, tests, workshop)
+                except Exception as e:
+                    log(f"  ❌ Grading failed: {e}")
+                    status, final_status, details, commit = ("Unknown Error", "Unknown Error",
+                                                             shorten(f"Grading failed: {e}"), None)
+                if journal is not None:
+                    journal.record(section, workshop, str(student_name), None if pd.isna(repo_url) else repo_url,
+                                   commit, status, final_status, details, started_at)
+        log(f"  Status: {status} -> {final_status}")
+        result = {
+            STUDENT_NAME_COLUMN: student_name,
+            f"Workshop {workshop} Status": final_status,
+            f"Workshop {workshop} Details": details
+        }
+        return result, "\n".join(_worker_log.lines)
+    finally:
+        _worker_log.lines = None
 
-        # --- run test cases ---
-        return run_tests(clone_path, main_class, tests)
+def grade_entries(entries, jobs=DEFAULT_JOBS, resume=False):
+    """
+    Grades (student_name, repo_url, tests, workshop, section) entries, which
+    may come from several sections and workshops, using one pool of `jobs`
+    workers. Output and results are returned in the order of the entries.
+    """
+    results = []
+    pool = ThreadPoolExecutor(max_workers=max(1, jobs))
+    try:
+        graded = pool.map(lambda entry: grade_student(entry[0], entry[1], entry[2], entry[3], entry[4], resume),
+                          entries)
+        for result, output in graded:
+            print(output)
+            results.append(result)
+    except KeyboardInterrupt:
+        # Students already graded are in the journal; --resume continues from there.
+        pool.shutdown(wait=False, cancel_futures=True)
+        raise
+    pool.shutdown()
+    return results
+
+def results_from_journal(section, workshop, student_names):
+    """Builds the results rows for the roster from the latest journal entries."""
+    latest = journal.latest(section, workshop)
+    results = []
+    for student_name in student_names:
+        entry = latest.get(str(student_name))
+        if entry is None:
+            continue
+        results.append({
+            STUDENT_NAME_COLUMN: student_name,
+            f"Workshop {workshop} Status": entry["final_status"],
+            f"Workshop {workshop} Details": entry["details"]
+        })
+    return results
+
+def similarity_report(workshop, rosters, report_path):
+    """
+    Compares the latest graded commits of the students in rosters
+    ({section: student names}) and writes the similar pairs to report_path.
+    Returns a note per (section, student) with their closest match.
+    """
+    signatures = {}
+    for section, names in rosters.items():
+        latest = journal.latest(section, workshop)
+        for name in names:
+            entry = latest.get(str(name))
+            if entry is not None and entry["commit_sha"]:
+                signatures[(section, str(name))] = fingerprints.for_commit(entry["commit_sha"])
+    pairs = similarity.similar_pairs(signatures, SIMILARITY_THRESHOLD)
+    similarity.write_report(pairs, report_path)
+    print(f"🔍 {len(pairs)} similar pair(s) among {len(signatures)} submissions, written to '{report_path}'.")
+    notes = {}
+    for key, (other, score) in similarity.best_matches(pairs).items():
+        notes[key] = f"{score:.2f} with {other[1]}" + ("" if other[0] == key[0] else f" (L2C{other[0]})")
+    return notes
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Clone, compile and test student Java workshop projects.")
+    parser.add_argument("--section", help="section number, e.g. 5 for sheet L2C5 (prompted if omitted)")
+    parser.add_argument("--batch", metavar="MANIFEST",
+                        help="grade every section and workshop listed in a JSON (or YAML) manifest, without prompts")
+    parser.add_argument("--workshop", type=int, help="workshop number 1-11 (prompted if omitted)")
+    parser.add_argument("--assignment-id", help="GitHub Classroom assignment ID (prompted if omitted)")
+    parser.add_argument("--skip-download", action="store_true",
+                        help="don't download the Classroom roster, use the CSV already on disk (if any)")
+    parser.add_argument("--jobs", "-j", type=int, default=DEFAULT_JOBS,
+                        help=f"number of students graded in parallel (default: {DEFAULT_JOBS})")
+    parser.add_argument("--runner", choices=["harness", "process"], default=TEST_RUNNER,
+                        help="run all tests of a student in one JVM (harness) or one JVM per test (process)")
+    parser.add_argument("--jvm-profile", choices=["fast", "default"], default=JVM_PROFILE,
+                        help="launch JVMs with a shared class archive and fast-start flags (fast) or plain (default)")
+    parser.add_argument("--compile-server", action="store_true",
+                        help="compile all submissions in one long-lived JVM instead of running javac per student")
+    parser.add_argument("--no-grade-cache", action="store_true",
+                        help="compile and grade every submission even if identical sources were graded before")
+    parser.add_argument("--resume", action="store_true",
+                        help="skip students whose current commit was already graded for this section and workshop")
+    parser.add_argument("--profile", metavar="PATH",
+                        help="write per-student and per-phase timings to PATH (JSON) and a CSV next to it")
+    parser.add_argument("--watch", action="store_true",
+                        help="keep polling the roster and grade students as soon as they push new commits")
+    parser.add_argument("--interval", type=int, default=WATCH_INTERVAL,
+                        help=f"seconds between polls in --watch mode (default: {WATCH_INTERVAL})")
+    parser.add_argument("--debounce", type=int, default=WATCH_DEBOUNCE,
+                        help=f"grade a new commit once nothing was pushed for this many seconds (default: {WATCH_DEBOUNCE})")
+    parser.add_argument("--max-polls", type=int, default=0,
+                        help="stop --watch mode after this many polls (default: run until Ctrl-C)")
+    parser.add_argument("--work-queue", metavar="PATH",
+                        help="grade through a SQLite job queue on a shared mount instead of only on this machine")
+    parser.add_argument("--worker", action="store_true",
+                        help="grade jobs from --work-queue until stopped (run one per machine)")
+    parser.add_argument("--local-workers", type=int, default=0,
+                        help="with --work-queue, also start this many worker processes on this machine")
+    parser.add_argument("--idle-exit", type=int, default=0,
+                        help="stop a --worker after this many seconds without jobs (default: keep waiting)")
+    parser.add_argument("--similarity", action="store_true",
+                        help="report pairs of similar submissions and add a similarity column to the results")
+    parser.add_argument("--no-repo-cache", action="store_true",
+                        help="clone every repository from scratch instead of using the local mirror cache")
+    commands = parser.add_subparsers(dest="command", metavar="COMMAND",
+                                     help="quick commands instead of grading a section")
+    commands.add_parser("list-workshops", help="list the workshops of the test plan")
+    validate = commands.add_parser("validate-tests", help="check a workshop inputs file for mistakes")
+    validate.add_argument("path", nargs="?", help=f"file to check (default: {WORKSHOP_INPUTS})")
+    grade_dir = commands.add_parser("grade-dir", help="grade a local project directory and print the result")
+    grade_dir.add_argument("directory", help="project directory, e.g. a student's clone")
+    grade_dir.add_argument("--workshop", type=int, required=True, help="workshop whose tests to run")
+    return parser.parse_args(argv)
+
+def start_run(args):
+    """Sets up the caches, journal and profile shared by every student of the run."""
+    global repo_cache, grade_cache, journal, fingerprints, TEST_RUNNER, JVM_PROFILE
+    TEST_RUNNER = args.runner
+    JVM_PROFILE = args.jvm_profile
+    if args.profile:
+        profiling.active_profile = profiling.RunProfile()
+    if not args.no_repo_cache:
+        repo_cache = RepoCache(os.path.join(CACHE_DIR, "repos"), REPO_CACHE_MAX_MB * 1024 * 1024, CLONE_TIMEOUT)
+    if not args.no_grade_cache:
+        grade_cache = GradeCache(os.path.join(CACHE_DIR, "grades"), GRADE_CACHE_MAX_MB * 1024 * 1024)
+    if args.similarity:
+        fingerprints = similarity.FingerprintStore(os.path.join(CACHE_DIR, "similarity"))
+    os.makedirs(os.path.dirname(GRADING_JOURNAL) or ".", exist_ok=True)
+    journal = GradingJournal(GRADING_JOURNAL)
+
+def grade_distributed(entries, args):
+    """
+    Puts the entries in the --work-queue and waits until workers (on other
+    machines, or the --local-workers started here) have graded them. Their
+    results are recorded in the local journal like locally graded students.
+    Students no worker could grade are recorded as "Unknown Error", so an
+    older grade of theirs isn't exported instead.
+    """
+    if args.resume:
+        entries = [e for e in entries if already_graded(e[0], e[1], e[3], e[4]) is None]
+    queue = WorkQueue(args.work_queue, WORK_LEASE_SECONDS)
+    run_id = queue.enqueue(entries)
+    print(f"Queued {len(entries)} students as run {run_id} in '{args.work_queue}'. Start workers with:\n"
+          f"  python grade_java_projects.py --worker --work-queue {args.work_queue}")
+    worker_command = [sys.executable, os.path.abspath(__file__), "--worker", "--work-queue", args.work_queue,
+                      "--idle-exit", "10", "--runner", TEST_RUNNER, "--jvm-profile", JVM_PROFILE]
+    worker_command += [flag for flag, on in (("--no-grade-cache", args.no_grade_cache),
+                                             ("--no-repo-cache", args.no_repo_cache),
+                                             ("--similarity", args.similarity)) if on]
+    local_workers = [subprocess.Popen(worker_command) for _ in range(args.local_workers)]
+    try:
+        last = None
+        while True:
+            counts = queue.progress(run_id)
+            finished = counts.get("done", 0) + counts.get("failed", 0)
+            if counts != last:
+                print(f"  {finished}/{len(entries)} graded, {counts.get('leased', 0)} in progress")
+                last = counts
+            if finished >= len(entries):
+                break
+            # Without a live lease nobody is grading; queued jobs would wait forever
+            if local_workers and all(p.poll() is not None for p in local_workers) and not counts.get("leased"):
+                print(f"❌ Error: all local workers exited with {len(entries) - finished} student(s) not graded.")
+                queue.fail_unfinished(run_id)
+                break
+            time.sleep(2)
+    finally:
+        for process in local_workers:
+            process.terminate()
+            process.wait()
 
-def main():
+    for job in queue.finished(run_id):
+        if job["state"] == "failed":
+            details = (f"No worker finished grading after {job['attempts']} attempts." if job["attempts"]
+                       else "No worker was left to grade it.")
+            print(f"⚠️ {job['student']}: {details}")
+            journal.record(job["section"], job["workshop"], job["student"], job["repo_url"], None,
+                           "Grading Failed", "Unknown Error", details, job["started_at"])
+            continue
+        print(job["output"])
+        journal.record(job["section"], job["workshop"], job["student"], job["repo_url"], job["commit_sha"],
+                       job["status"], job["final_status"], job["details"], job["started_at"], job["finished_at"])
+    queue.close()
+
+def grade_job(job):
+    """Grades one job from the work queue. Returns (status, final status, details, commit, output)."""
+    _worker_log.lines = [f"\nProcessing {job['student']} (L2C{job['section']}, workshop {job['workshop']})..."]
+    try:
+        with profiling.student(job["student"], section=job["section"], workshop=job["workshop"]):
+            status, final_status, details, commit = grade_submission(job["repo_url"], job["tests"], job["workshop"])
+        log(f"  Status: {status} -> {final_status}")
+        return status, final_status, details, commit, "\n".join(_worker_log.lines)
+    finally:
+        _worker_log.lines = None
+
+def run_worker(args):
+    """
+    Grades jobs from the --work-queue with --jobs threads, renewing their
+    leases while they run. Stops after --idle-exit seconds without work
+    (never with 0). Returns the exit code.
+    """
+    try:
+        workshop_tests()  # main classes of the workshops, loaded before the threads start
+    except TestPlanError as e:
+        print(f"Error in '{WORKSHOP_INPUTS}':\n{e}")
+        return 1
+    queue = WorkQueue(args.work_queue, WORK_LEASE_SECONDS)
+    worker = f"{socket.gethostname()}:{os.getpid()}"
+    held = set()
+    held_lock = threading.Lock()
+    stop = threading.Event()
+    get_jvm_flags()
+    print(f"Worker {worker} grading jobs from '{args.work_queue}' with {max(1, args.jobs)} thread(s)...")
+
+    def heartbeat():
+        while not stop.wait(WORK_LEASE_SECONDS / 4):
+            with held_lock:
+                job_ids = list(held)
+            for job_id in queue.heartbeat(job_ids, worker):
+                print(f"⚠️ Lost the lease on job {job_id}, another worker may grade it as well.")
+
+    def work():
+        idle_since = time.monotonic()
+        while not stop.is_set():
+            job = queue.claim(worker)
+            if job is None:
+                if args.idle_exit and time.monotonic() - idle_since >= args.idle_exit:
+                    return
+                time.sleep(1)
+                continue
+            with held_lock:
+                held.add(job["id"])
+            try:
+                status, final_status, details, commit, output = grade_job(job)
+                queue.complete(job["id"], worker, status, final_status, details, commit, output)
+                print(output)
+            except Exception as e:
+                # Back to the queue for another attempt, without waiting for the lease to run out
+                print(f"❌ Grading {job['student']} failed: {e}")
+                queue.release(job["id"], worker)
+            finally:
+                with held_lock:
+                    held.discard(job["id"])
+            idle_since = time.monotonic()
+
+    threading.Thread(target=heartbeat, daemon=True).start()
+    try:
+        with ThreadPoolExecutor(max_workers=max(1, args.jobs)) as pool:
+            for future in [pool.submit(work) for _ in range(max(1, args.jobs))]:
+                future.result()
+    except KeyboardInterrupt:
+        print("\nWorker stopped, unfinished jobs go back to the queue when their lease runs out.")
+    finally:
+        stop.set()
+        queue.close()
+    if repo_cache is not None:
+        repo_cache.evict()
+    if grade_cache is not None:
+        grade_cache.evict()
+    return 0
+
+def grade_all(entries, args):
+    """Grades the entries in one worker pool (and compile server), then trims the caches."""
+    global compile_server
+    if args.work_queue:
+        grade_distributed(entries, args)
+        return
+    jobs = max(1, args.jobs)
+    if args.compile_server:
+        compile_server = start_compile_server(jobs)
+    try:
+        grade_entries(entries, jobs, args.resume)
+    finally:
+        if compile_server is not None:
+            compile_server.stop()
+            compile_server = None
+    if repo_cache is not None:
+        for path in repo_cache.evict():
+            print(f"Evicted cached repository {path}")
+    if grade_cache is not None:
+        grade_cache.evict()
+
+def finish_run(args):
+    if profiling.active_profile is not None:
+        print("\n" + profiling.active_profile.summary())
+        csv_path = profiling.active_profile.save(args.profile)
+        print(f"Run profile written to '{args.profile}' and '{csv_path}'.")
+
+def classroom_update(section, workshop, updater=None):
+    """
+    Merges the downloaded Classroom CSV of a section and workshop into the
+    submissions workbook. Without an updater the workbook is saved right away.
+    """
+    classroom_file = os.path.join(CLASSROOM_DIR+f"\\L2C{section}", f"workshop_{workshop}.csv")
+    if not os.path.exists(classroom_file):
+        print(f"⚠️ No classroom CSV found at {classroom_file}, skipping update.")
+        return
+    with phase("classroom_update"):
+        try:
+            save = updater is None
+            updater = updater or roster.SubmissionsUpdater(STUDENT_SUBMISSIONS, STUDENT_NAME_COLUMN)
+            update_master_with_classroom(updater, classroom_file, workshop, f"L2C{section}")
+            if save:
+                updater.save()
+        except Exception as e:
+            print(f"❌ Error updating master submissions: {e}")
+
+def roster_rows(df, workshop):
+    """(student name, repo URL) for every row of a submissions sheet."""
+    repo_url_column = f"Workshop {workshop} Repo URL"
+    return [(row[STUDENT_NAME_COLUMN], row.get(repo_url_column)) for _, row in df.iterrows()]
+
+def add_similarity(results, workshop, section, notes):
+    for result in results:
+        result[f"Workshop {workshop} Similarity"] = notes.get((section, str(result[STUDENT_NAME_COLUMN])))
+
+def run_batch(args):
+    """
+    Grades every section and workshop of the --batch manifest in one worker
+    pool. The submissions workbook is read once and the results workbook is
+    written once at the end. Returns the exit code.
+    """
+    try:
+        batch_jobs = load_manifest(args.batch)
+    except (OSError, ValueError, ManifestError) as e:
+        print(f"Error reading batch manifest: {e}")
+        return 1
+    for section, workshop, _ in batch_jobs:
+        if str(workshop) not in workshop_tests():
+            print(f"Error: Workshop {workshop} (section {section}) is not defined in the JSON file.")
+            return 1
+
+    for section, workshop, assignment_id in batch_jobs:
+        if assignment_id and not args.skip_download:
+            try:
+                with phase("download_roster", section=section, workshop=workshop):
+                    download_repo.start_download(section, workshop, assignment_id)
+            except ConnectionError:
+                print("connect to internet...")
+    try:
+        updater = roster.SubmissionsUpdater(STUDENT_SUBMISSIONS, STUDENT_NAME_COLUMN)
+    except OSError as e:
+        print(f"⚠️ Could not open '{STUDENT_SUBMISSIONS}' for the Classroom update: {e}")
+        updater = None
+    if updater is not None:
+        for section, workshop, _ in batch_jobs:
+            classroom_update(section, workshop, updater)
+        updater.save()
+
+    if not os.path.exists(STUDENT_SUBMISSIONS):
+        print(f"Error: The file '{STUDENT_SUBMISSIONS}' was not found.")
+        return 1
+    try:
+        with phase("read_submissions"):
+            sheets = pd.read_excel(STUDENT_SUBMISSIONS, sheet_name=None)
+    except Exception as e:
+        print(f"Error reading Excel file: {e}")
+        return 1
+
+    get_jvm_flags()  # builds the shared class archive once, before the workers start
+    calibrated = {}
+    rosters = {}
+    entries = []
+    for section, workshop, _ in batch_jobs:
+        df = sheets.get(f"L2C{section}")
+        if df is None:
+            print(f"⚠️ No sheet 'L2C{section}' in '{STUDENT_SUBMISSIONS}', skipping section {section}.")
+            continue
+        if workshop not in calibrated:
+            calibrated[workshop] = calibrate_tests(workshop, workshop_tests()[str(workshop)].get("tests", []))
+        rows = roster_rows(df, workshop)
+        rosters[(section, workshop)] = [name for name, _ in rows]
+        entries += [(name, url, calibrated[workshop], workshop, section) for name, url in rows]
+
+    print(f"Grading {len(entries)} submissions of {len(rosters)} section/workshop pair(s) "
+          f"with {max(1, args.jobs)} parallel job(s)...")
+    grade_all(entries, args)
+
+    # Similar submissions are looked for across all sections of a workshop
+    notes = {}
+    if fingerprints is not None:
+        for workshop in sorted({w for _, w in rosters}):
+            report_path = os.path.join(os.path.dirname(STUDENT_RESULTS) or ".", f"similarity_workshop_{workshop}.csv")
+            sections = {section: names for (section, w), names in rosters.items() if w == workshop}
+            with phase("similarity", workshop=workshop):
+                notes[workshop] = similarity_report(workshop, sections, report_path)
+
+    print(f"\nWriting results for {len(rosters)} section/workshop pair(s) to '{STUDENT_RESULTS}'...")
+    try:
+        with phase("write_results"):
+            writer = results_writer.ResultsWriter(STUDENT_RESULTS, STUDENT_NAME_COLUMN)
+            for (section, workshop), names in rosters.items():
+                results = results_from_journal(section, workshop, names)
+                if workshop in notes:
+                    add_similarity(results, workshop, section, notes[workshop])
+                writer.update(f"L2C{section}", workshop, results)
+                counts = pd.Series([r[f"Workshop {workshop} Status"] for r in results]).value_counts()
+                print(f"  L2C{section} workshop {workshop}: " + ", ".join(f"{k} {v}" for k, v in counts.items()))
+            writer.save()
+        print("--- Script finished successfully! ---")
+    except Exception as e:
+        print(f"\nError writing to Excel file: {e}")
+        return 1
+    return 0
+
+def watch_roster(section, workshop, assignment_id):
+    """
+    Current {student name: repo URL} of a section: the submissions sheet,
+    updated with the Classroom roster when there is an assignment ID.
+    """
+    repos = {}
+    if os.path.exists(STUDENT_SUBMISSIONS):
+        try:
+            df = pd.read_excel(STUDENT_SUBMISSIONS, sheet_name=f"L2C{section}")
+            repos = {name: url for name, url in roster_rows(df, workshop) if not pd.isna(name)}
+        except Exception as e:
+            print(f"⚠️ Could not read '{STUDENT_SUBMISSIONS}': {e}")
+    token = os.getenv("GITHUB_TOKEN")
+    if assignment_id and token:
+        grades = [g for g in download_repo.fetch_assignment_grades(assignment_id, token)
+                  if str(g.get("roster_identifier") or "").strip() and g.get("student_repository_url")]
+        index = roster.RosterIndex(repos)
+        identifiers = [str(g["roster_identifier"]).strip() for g in grades]
+        for grade, identifier, (pos, _) in zip(grades, identifiers, index.match(identifiers)):
+            repos[identifier if pos is None else index.names[pos]] = grade["student_repository_url"]
+    return repos
+
+def run_watch(args, section, workshop, tests):
+    """
+    Polls the roster every args.interval seconds and grades only students
+    whose remote HEAD differs from the commit graded last (see watch.py).
+    Their rows in the results workbook are updated after every poll that
+    graded someone. Runs until Ctrl-C, or for args.max_polls polls.
+    """
+    tracker = ChangeTracker(args.debounce)
+    print(f"Watching L2C{section} workshop {workshop} every {args.interval}s "
+          f"(debounce {args.debounce}s), Ctrl-C to stop.")
+    polls = 0
+    try:
+        while True:
+            polls += 1
+            with phase("watch_poll"):
+                repos = {name: url for name, url in watch_roster(section, workshop, args.assignment_id).items()
+                          if url and not pd.isna(url)}
+                with ThreadPoolExecutor(max_workers=max(1, args.jobs)) as pool:
+                    heads = dict(zip(repos, pool.map(remote_head, repos.values())))
+                graded = {student: entry["commit_sha"] for student, entry in journal.latest(section, workshop).items()}
+                due = tracker.due({str(name): head for name, head in heads.items()}, graded)
+
+            if due:
+                names = [name for name in repos if str(name) in due]
+                print(f"\n[{time.strftime('%H:%M:%S')}] {len(names)} changed repositories: {', '.join(map(str, names))}")
+                grade_all([(name, repos[name], tests, workshop, section) for name in names], args)
+                for name in names:
+                    tracker.mark_graded(str(name), heads[name])
+                results = results_from_journal(section, workshop, names)
+                try:
+                    with phase("write_results"):
+                        writer = results_writer.ResultsWriter(STUDENT_RESULTS, STUDENT_NAME_COLUMN)
+                        writer.update(f"L2C{section}", workshop, results)
+                        writer.save()
+                    print(f"Updated {len(results)} row(s) in '{STUDENT_RESULTS}'.")
+                except Exception as e:
+                    print(f"\nError writing to Excel file (retrying after the next change): {e}")
+            else:
+                waiting = tracker.waiting()
+                print(f"[{time.strftime('%H:%M:%S')}] No changes to grade"
+                      + (f", {waiting} waiting for pushes to settle." if waiting else "."))
+
+            if args.max_polls and polls >= args.max_polls:
+                break
+            # Come back sooner when a change is only waiting for its debounce
+            time.sleep(min(args.interval, args.debounce) if tracker.waiting() else args.interval)
+    except KeyboardInterrupt:
+        print("\nStopped watching.")
+
+def list_workshops():
+    """Prints every workshop of the test plan with its number of tests."""
+    for workshop, spec in sorted(workshop_tests().items(), key=lambda item: int(item[0])):
+        extras = [f"{len(spec['tests'])} test(s)"]
+        if spec["reference"]:
+            extras.append("reference solution")
+        if spec["main_class"]:
+            extras.append(f"main class {spec['main_class']}")
+        print(f"Workshop {workshop}: {spec['task'] or '(no task)'} ({', '.join(extras)})")
+
+def validate_tests(path):
+    """Checks a workshop inputs file and prints what is wrong with it. Returns True if it is valid."""
+    try:
+        plan = read_plan(path)
+    except TestPlanError as e:
+        print(f"❌ Problems in '{path}':\n{e}")
+        return False
+    print(f"✅ '{path}' is valid: {len(plan)} workshop(s), "
+          f"{sum(len(spec['tests']) for spec in plan.values())} test(s).")
+    return True
+
+def grade_directory(directory, workshop):
+    """Grades a local project directory with a workshop's tests and prints the log. Returns the status."""
+    spec = workshop_tests().get(str(workshop))
+    if spec is None:
+        print(f"Error: Workshop {workshop} is not defined in the JSON file.")
+        return None
+    if not os.path.isdir(directory):
+        print(f"Error: '{directory}' is not a directory.")
+        return None
+    get_jvm_flags()
+    tests = calibrate_tests(workshop, spec["tests"])
+    print(f"\nProcessing {directory}...")
+    with tempfile.TemporaryDirectory() as temp_dir:
+        # Graded in a copy so that compiled classes don't end up in the project
+        project = os.path.join(temp_dir, "repo")
+        shutil.copytree(directory, project, ignore=shutil.ignore_patterns(*SKIP_DIRS))
+        status, details = grade_checkout(project, tests, {}, spec["main_class"])
+    print(f"  Status: {status} -> {FINAL_STATUS.get(status.strip(), 'Unknown Error')}")
+    if details:
+        print(shorten(details))
+    return status
+
+def main(argv=None):
     """Main function to drive the script.
      Ask user which workshop column to use 
     (columns named "Workshop 1 Repo URL" .. "Workshop 11 Repo URL")
      """
+    load_config()
+    args = parse_args(argv)
+    try:
+        if args.command == "list-workshops":
+            list_workshops()
+            return 0
+        if args.command == "validate-tests":
+            return 0 if validate_tests(args.path or WORKSHOP_INPUTS) else 1
+        if args.command == "grade-dir":
+            start_run(args)
+            status = grade_directory(args.directory, args.workshop)
+            finish_run(args)
+            return 0 if status is not None else 1
+    except TestPlanError as e:
+        print(f"Error in '{WORKSHOP_INPUTS}':\n{e}")
+        return 1
+
+    start_run(args)
     print("--- Starting Student Project Grader ---")  
-    
+    if args.worker:
+        if not args.work_queue:
+            print("Error: --worker needs --work-queue PATH.")
+            return 1
+        exit_code = run_worker(args)
+        finish_run(args)
+        return exit_code
+    missing = missing_config()
+    if missing:
+        print(f"Error: set {' and '.join(missing)} in the environment or in .env.")
+        return 1
+    try:
+        workshop_tests()
+    except TestPlanError as e:
+        print(f"Error in '{WORKSHOP_INPUTS}':\n{e}")
+        return 1
+    if args.batch:
+        exit_code = run_batch(args)
+        finish_run(args)
+        return exit_code
+
     # Ask section
-    section = input("Enter section number: ").strip().upper()
+    section = (args.section or input("Enter section number: ")).strip().upper()
     INPUT_SHEET_NAME = f"L2C{section}"
     OUTPUT_SHEET_NAME = f"L2C{section}"
     print(f"Working on section: {INPUT_SHEET_NAME}")
     
-    while True:
+    workshop = args.workshop
+    if workshop is not None and not 1 <= workshop <= 11:
+        print("Please enter a number between 1 and 11.")
+        return 1
+    while workshop is None:
         try:
             workshop = int(input("Enter workshop number (1-11): "))
             if 1 <= workshop <= 11:
                 break
         except ValueError:
             pass
+        workshop = None
         print("Please enter a number between 1 and 11.")
     # Validate if the workshop exists in the JSON
-    if str(workshop) not in WORKSHOP_TESTS:
+    if str(workshop) not in workshop_tests():
         print(f"Error: Workshop {workshop} is not defined in the JSON file.")
-        return
-    try:
-        start_download(section, workshop)
-    except ConnectionError:
-        print("connect to internet...")
-    
-    CLASSROOM_FILE = os.path.join(CLASSROOM_DIR+f"\\L2C{section}", f"workshop_{workshop}.csv")
-
-    if os.path.exists(CLASSROOM_FILE):
-        update_master_with_classroom(STUDENT_SUBMISSIONS, CLASSROOM_FILE, workshop, INPUT_SHEET_NAME)
+        return 1
+    if args.watch:
+        # The roster is fetched on every poll instead
+        get_jvm_flags()
+        run_watch(args, section, workshop, calibrate_tests(workshop, workshop_tests()[str(workshop)].get("tests", [])))
+        finish_run(args)
+        return 0
+    if args.skip_download:
+        print("Skipping Classroom download.")
     else:
-        print(f"⚠️ No classroom CSV found at {CLASSROOM_FILE}, skipping update.")
+        try:
+            with phase("download_roster"):
+                download_repo.start_download(section, workshop, args.assignment_id)
+        except ConnectionError:
+            print("connect to internet...")
+    
+    classroom_update(section, workshop)
         
     REPO_URL_COLUMN = f"Workshop {workshop} Repo URL"
     print(f"Using repository column: '{REPO_URL_COLUMN}'")
 
     if not os.path.exists(STUDENT_SUBMISSIONS):
         print(f"Error: The file '{STUDENT_SUBMISSIONS}' was not found.")
-        return
+        return 1
     
     # get the tests for the workshop
-    tests = WORKSHOP_TESTS.get(str(workshop), {}).get("tests", [])   
+    tests = workshop_tests().get(str(workshop), {}).get("tests", [])   
     
     try:
-        df = pd.read_excel(STUDENT_SUBMISSIONS, sheet_name=INPUT_SHEET_NAME)
+        with phase("read_submissions"):
+            df = pd.read_excel(STUDENT_SUBMISSIONS, sheet_name=INPUT_SHEET_NAME)
     except Exception as e:
         print(f"Error reading Excel file: {e}")
-        return
+        return 1
 
-    results = []
-    for index, row in df.iterrows():
-        student_name = row[STUDENT_NAME_COLUMN]
-        repo_url = row.get(REPO_URL_COLUMN)
-        print(f"\nProcessing {student_name}...")
-        
-        status, details = process_student_repo(repo_url, tests)
-        
-        final_status = {
-            "Absent": "⛔Absent",
-            "Git Clone Error": "❌Incomplete",
-            "Compile Error": "❌Incomplete",
-            "Runtime Error": "⚠️Partial Complete",
-            "Incomplete": "❌Incomplete",
-            "Partial Complete": "⚠️Partial Complete",
-            "✅Complete": "✅Complete"
-        }.get(status.strip(), "Unknown Error")
-
-        print(f"  Status: {status} -> {final_status}")
-        
-        results.append({
-            STUDENT_NAME_COLUMN: student_name,
-            f"Workshop {workshop} Status": final_status,
-            f"Workshop {workshop} Details": details
-        })
+    rows = roster_rows(df, workshop)
+    print(f"Grading {len(rows)} students with {max(1, args.jobs)} parallel job(s)...")
+    get_jvm_flags()  # builds the shared class archive once, before the workers start
+    tests = calibrate_tests(workshop, tests)
+    grade_all([(name, url, tests, workshop, section) for name, url in rows], args)
 
+    results = results_from_journal(section, workshop, [name for name, _ in rows])
+    if fingerprints is not None:
+        report_path = os.path.join(os.path.dirname(STUDENT_RESULTS) or ".",
+                                   f"similarity_L2C{section}_workshop_{workshop}.csv")
+        with phase("similarity"):
+            notes = similarity_report(workshop, {section: [name for name, _ in rows]}, report_path)
+        add_similarity(results, workshop, section, notes)
     results_df = pd.DataFrame(results)
-        
+    print(f"Evaluated results: \n", results_df)
 
     print(f"\nWriting results to sheet '{OUTPUT_SHEET_NAME}' in '{STUDENT_RESULTS}'...")
-    ''' FIXME if there are no students name but has results then it will fail, gives -> Error writing to Excel file: cannot reindex on an axis with duplicate labels
-    if there is no data in the workshop with column name format, it start writing from the first column with the workshop column name
-    it is possible to check or set status of workshops of later weeks even if the previous weeks statuses are not there
-    Works properly if the student name column has student names'''
     try:
-        status_col = f"Workshop {workshop} Status"
-        # details_col = f"Workshop {workshop} Details"
-        # Read existing Results sheet if present
-        if os.path.exists(STUDENT_RESULTS):
-            try:
-                existing = pd.read_excel(STUDENT_RESULTS, sheet_name=OUTPUT_SHEET_NAME)
-            except Exception:
-                existing = pd.DataFrame()
-        else:
-            existing = pd.DataFrame()
-
-        new = results_df.copy()  # results_df contains STUDENT_NAME_COLUMN and the two workshop columns
-        print(f"Evaluated results: \n",new)
-        # If an existing Results sheet has a student name column, merge by student name
-        if not existing.empty and STUDENT_NAME_COLUMN in existing.columns:
-            existing = existing.set_index(STUDENT_NAME_COLUMN)
-            new = new.set_index(STUDENT_NAME_COLUMN)
-
-            all_index = existing.index.union(new.index)
-            existing = existing.reindex(all_index)
-
-            # Update/insert the two workshop columns from the new results (aligns by student)
-            existing[status_col] = new[status_col].reindex(all_index)
-            # existing[details_col] = new[details_col].reindex(all_index)
-
-            merged = existing.reset_index()
-        else:
-            # No existing results to merge with — use the new results as-is
-            merged = new.reset_index() if STUDENT_NAME_COLUMN in new.index.names else new
-
-        # Write back just the Results sheet (replace it) while preserving other sheets in the workbook
-        mode = 'a' if os.path.exists(STUDENT_RESULTS) else 'w'
-        with pd.ExcelWriter(STUDENT_RESULTS, engine='openpyxl', mode=mode, if_sheet_exists='replace') as writer:
-            merged.to_excel(writer, sheet_name=OUTPUT_SHEET_NAME, index=False)
-
-        add_dropdown_to_status_column(STUDENT_RESULTS, OUTPUT_SHEET_NAME, workshop) 
-        format_results_sheet(STUDENT_RESULTS, OUTPUT_SHEET_NAME)
+        with phase("write_results"):
+            writer = results_writer.ResultsWriter(STUDENT_RESULTS, STUDENT_NAME_COLUMN)
+            writer.update(OUTPUT_SHEET_NAME, workshop, results)
+            writer.save()
+        print(f"Updated and formatted '{OUTPUT_SHEET_NAME}' in '{STUDENT_RESULTS}'.")
         print("--- Script finished successfully! ---")
     except Exception as e:
         print(f"\nError writing to Excel file: {e}")
+        finish_run(args)
+        return 1
+
+    finish_run(args)
+    return 0
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    sys.exit(main())
\ No newline at end of file
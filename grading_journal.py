@@ -0,0 +1,68 @@
+import sqlite3
+import threading
+import time
+
+# Append-only SQLite journal of grading results.
+# Every student is recorded as soon as they are graded, so a crash or Ctrl-C
+# loses nothing, and --resume can skip students whose commit was already graded.
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS grades (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    section TEXT NOT NULL,
+    workshop INTEGER NOT NULL,
+    student TEXT NOT NULL,
+    repo_url TEXT,
+    commit_sha TEXT,
+    status TEXT NOT NULL,
+    final_status TEXT NOT NULL,
+    details TEXT,
+    started_at REAL,
+    finished_at REAL
+);
+CREATE INDEX IF NOT EXISTS grades_lookup ON grades (section, workshop, student, commit_sha);
+"""
+
+class GradingJournal:
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.row_factory = sqlite3.Row
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.executescript(SCHEMA)
+
+    def record(self, section, workshop, student, repo_url, commit_sha, status, final_status, details,
+               started_at, finished_at=None):
+        """Appends one graded student and commits immediately."""
+        with self._lock:
+            self._db.execute(
+                "INSERT INTO grades (section, workshop, student, repo_url, commit_sha, status, final_status,"
+                " details, started_at, finished_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (section, workshop, student, repo_url, commit_sha, status, final_status, details,
+                 started_at, finished_at if finished_at is not None else time.time())
+            )
+            self._db.commit()
+
+    def find(self, section, workshop, student, commit_sha):
+        """Latest entry for this student and commit, or None."""
+        with self._lock:
+            return self._db.execute(
+                "SELECT * FROM grades WHERE section = ? AND workshop = ? AND student = ? AND commit_sha = ?"
+                " ORDER BY id DESC LIMIT 1",
+                (section, workshop, student, commit_sha)
+            ).fetchone()
+
+    def latest(self, section, workshop):
+        """Latest entry per student for a section and workshop, as {student: row}."""
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT * FROM grades WHERE id IN (SELECT MAX(id) FROM grades"
+                " WHERE section = ? AND workshop = ? GROUP BY student)",
+                (section, workshop)
+            ).fetchall()
+        return {row["student"]: row for row in rows}
+
+    def close(self):
+        with self._lock:
+            self._db.close()
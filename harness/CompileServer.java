@@ -0,0 +1,94 @@
+import java.io.BufferedReader;
+import java.io.File;
+import java.io.InputStreamReader;
+import java.io.PrintStream;
+import java.io.StringWriter;
+import java.nio.charset.StandardCharsets;
+import java.util.ArrayList;
+import java.util.Arrays;
+import java.util.Base64;
+import java.util.List;
+import java.util.concurrent.ExecutorService;
+import java.util.concurrent.Executors;
+import javax.tools.JavaCompiler;
+import javax.tools.JavaFileObject;
+import javax.tools.StandardJavaFileManager;
+import javax.tools.ToolProvider;
+
+/**
+ * Long-lived compiler for the grader, so students don't each pay for a cold
+ * javac JVM.
+ *
+ * Usage: java CompileServer <threads>
+ *
+ * Reads one request per line from stdin, all fields Base64 encoded and
+ * separated by tabs:
+ *
+ *   <id> TAB <working dir> TAB <output dir> TAB <source file> [TAB <source file> ...]
+ *
+ * Relative source paths are resolved against the working dir. For each
+ * request it prints one line with the javac exit code and diagnostics:
+ *
+ *   @@DONE <id> <exit code> <Base64 diagnostics>
+ *
+ * Requests are compiled concurrently on a fixed pool of threads.
+ */
+public class CompileServer {
+
+    public static void main(String[] args) throws Exception {
+        int threads = args.length > 0 ? Integer.parseInt(args[0]) : Runtime.getRuntime().availableProcessors();
+        JavaCompiler compiler = ToolProvider.getSystemJavaCompiler();
+        if (compiler == null) {
+            System.err.println("No system Java compiler available (is this a JRE?)");
+            System.exit(2);
+        }
+        PrintStream out = new PrintStream(System.out, true, "UTF-8");
+        ExecutorService pool = Executors.newFixedThreadPool(threads);
+        out.println("@@READY");
+
+        BufferedReader reader = new BufferedReader(new InputStreamReader(System.in, StandardCharsets.US_ASCII));
+        String line;
+        while ((line = reader.readLine()) != null) {
+            if (line.trim().isEmpty()) {
+                continue;
+            }
+            final String request = line;
+            pool.submit(() -> handle(compiler, request, out));
+        }
+        pool.shutdown();
+    }
+
+    static void handle(JavaCompiler compiler, String request, PrintStream out) {
+        String[] fields = request.split("\t");
+        String id = decode(fields[0]);
+        int exitCode;
+        StringWriter diagnostics = new StringWriter();
+        try {
+            File workDir = new File(decode(fields[1]));
+            String outDir = decode(fields[2]);
+            List<File> sources = new ArrayList<>();
+            for (String field : Arrays.copyOfRange(fields, 3, fields.length)) {
+                File source = new File(decode(field));
+                sources.add(source.isAbsolute() ? source : new File(workDir, source.getPath()));
+            }
+            try (StandardJavaFileManager fileManager =
+                         compiler.getStandardFileManager(null, null, StandardCharsets.UTF_8)) {
+                Iterable<? extends JavaFileObject> units = fileManager.getJavaFileObjectsFromFiles(sources);
+                List<String> options = Arrays.asList("-d", outDir);
+                boolean ok = compiler.getTask(diagnostics, fileManager, null, options, null, units).call();
+                exitCode = ok ? 0 : 1;
+            }
+        } catch (Throwable e) {
+            diagnostics.write(e.toString());
+            exitCode = 2;
+        }
+        String encoded = Base64.getEncoder().encodeToString(diagnostics.toString().getBytes(StandardCharsets.UTF_8));
+        synchronized (out) {
+            out.println("@@DONE " + id + " " + exitCode + " " + (encoded.isEmpty() ? "-" : encoded));
+        }
+    }
+
+    static String decode(String field) {
+        return new String(Base64.getDecoder().decode(field), StandardCharsets.UTF_8);
+    }
+}
@@ -0,0 +1,262 @@
+import java.io.BufferedReader;
+import java.io.ByteArrayInputStream;
+import java.io.ByteArrayOutputStream;
+import java.io.File;
+import java.io.InputStream;
+import java.io.InputStreamReader;
+import java.io.PrintStream;
+import java.lang.reflect.InvocationTargetException;
+import java.lang.reflect.Method;
+import java.net.URL;
+import java.net.URLClassLoader;
+import java.nio.charset.StandardCharsets;
+import java.security.Permission;
+import java.util.ArrayList;
+import java.util.Base64;
+import java.util.List;
+import java.util.concurrent.CountDownLatch;
+import java.util.concurrent.TimeUnit;
+
+/**
+ * Runs every test case of one student inside a single JVM.
+ *
+ * Usage: java GraderHarness <class dir> <main class> <timeout ms> [<max output bytes>]
+ *
+ * Test inputs are read from stdin: the number of tests on the first line,
+ * then one line per test with its Base64 encoded input, optionally its own
+ * timeout in ms (otherwise the timeout argument applies) and optionally its
+ * Base64 encoded expected output ("-" for none). Each test loads the main
+ * class in a fresh class loader with System.in/out/err replaced by in-memory
+ * streams (capped at max output bytes each) and prints one line per finished
+ * test:
+ *
+ *   @@RESULT <test> EXIT <exit code> <Base64 stdout> <Base64 stderr>
+ *   @@RESULT <test> STOPPED <match|output_limit> <Base64 stdout> <Base64 stderr>
+ *   @@RESULT <test> TIMEOUT
+ *
+ * A test whose stdout or stderr goes past the cap is stopped right away. A
+ * test whose output contains the expected output still gets until its
+ * timeout to return, so the JVM can go on with the next test; only if it is
+ * still running then is it reported as STOPPED match instead of TIMEOUT.
+ * After a stopped test or a timeout the harness ends, because the student's
+ * thread cannot be killed safely. If the program calls System.exit() and it cannot be trapped
+ * (JDK 24+), the JVM exits without a result line. In all of these cases the
+ * grader runs the remaining tests as separate processes.
+ */
+public class GraderHarness {
+
+    static final class ExitTrap extends SecurityException {
+        final int status;
+
+        ExitTrap(int status) {
+            super("System.exit(" + status + ")");
+            this.status = status;
+        }
+    }
+
+    static volatile boolean trapExit = false;
+
+    /**
+     * Released when a test's program returns, or early with the reason it has
+     * to be stopped. `matched` is set once the expected output was seen.
+     */
+    static final class Verdict {
+        final CountDownLatch done = new CountDownLatch(1);
+        volatile String reason;
+        volatile boolean matched;
+
+        synchronized void settle(String why) {
+            if (reason == null) {
+                reason = why;
+            }
+            done.countDown();
+        }
+
+        void finished() {
+            done.countDown();
+        }
+    }
+
+    /**
+     * Keeps the first `limit` bytes written to it and drops the rest. Settles
+     * the verdict when the kept bytes contain `expected` or output is dropped.
+     */
+    static final class BoundedOutputStream extends ByteArrayOutputStream {
+        final int limit;
+        final byte[] expected;
+        final Verdict verdict;
+        boolean matched = false;
+
+        BoundedOutputStream(int limit, byte[] expected, Verdict verdict) {
+            this.limit = limit;
+            this.expected = expected;
+            this.verdict = verdict;
+        }
+
+        @Override
+        public synchronized void write(int b) {
+            write(new byte[] {(byte) b}, 0, 1);
+        }
+
+        @Override
+        public synchronized void write(byte[] b, int off, int len) {
+            int before = count;
+            int room = Math.max(0, limit - count);
+            super.write(b, off, Math.min(len, room));
+            if (expected != null && !matched
+                    && indexOf(buf, count, expected, Math.max(0, before - expected.length + 1)) >= 0) {
+                matched = true;
+                verdict.matched = true;
+            }
+            if (len > room) {
+                verdict.settle("output_limit");
+            }
+        }
+    }
+
+    public static void main(String[] args) throws Exception {
+        File classDir = new File(args[0]);
+        String mainClass = args[1];
+        long timeoutMillis = Long.parseLong(args[2]);
+        int maxOutput = args.length > 3 ? Integer.parseInt(args[3]) : Integer.MAX_VALUE - 8;
+
+        List<byte[]> inputs = new ArrayList<>();
+        List<Long> timeouts = new ArrayList<>();
+        List<byte[]> expected = new ArrayList<>();
+        readInputs(System.in, timeoutMillis, inputs, timeouts, expected);
+        PrintStream realOut = System.out;
+        PrintStream realErr = System.err;
+        installExitTrap();
+
+        for (int i = 0; i < inputs.size(); i++) {
+            Verdict verdict = new Verdict();
+            BoundedOutputStream out = new BoundedOutputStream(maxOutput, expected.get(i), verdict);
+            BoundedOutputStream err = new BoundedOutputStream(maxOutput, expected.get(i), verdict);
+            PrintStream testOut = new PrintStream(out, true, "UTF-8");
+            PrintStream testErr = new PrintStream(err, true, "UTF-8");
+            final int[] exitCode = {0};
+
+            URLClassLoader loader = new URLClassLoader(
+                    new URL[] {classDir.toURI().toURL()},
+                    ClassLoader.getSystemClassLoader().getParent());
+            Thread runner = new Thread(() -> {
+                exitCode[0] = invokeMain(loader, mainClass, testErr);
+                verdict.finished();
+            }, "main");
+            runner.setContextClassLoader(loader);
+            runner.setDaemon(true);
+
+            System.setIn(new ByteArrayInputStream(inputs.get(i)));
+            System.setOut(testOut);
+            System.setErr(testErr);
+            trapExit = true;
+            runner.start();
+            boolean released = verdict.done.await(timeouts.get(i), TimeUnit.MILLISECONDS);
+            if (released && verdict.reason == null) {
+                runner.join();  // main returned, the thread is only finishing
+            }
+
+            if (runner.isAlive()) {
+                // System.out stays the test's stream, so the still running
+                // program cannot write into the result lines.
+                String reason = verdict.reason != null ? verdict.reason : verdict.matched ? "match" : null;
+                if (reason != null) {
+                    realOut.println("@@RESULT " + (i + 1) + " STOPPED " + reason
+                            + " " + encode(out.toByteArray()) + " " + encode(err.toByteArray()));
+                } else {
+                    realOut.println("@@RESULT " + (i + 1) + " TIMEOUT");
+                }
+                realOut.flush();
+                Runtime.getRuntime().halt(0);
+            }
+            trapExit = false;
+            System.setOut(realOut);
+            System.setErr(realErr);
+            testOut.flush();
+            testErr.flush();
+            realOut.println("@@RESULT " + (i + 1) + " EXIT " + exitCode[0]
+                    + " " + encode(out.toByteArray()) + " " + encode(err.toByteArray()));
+            realOut.flush();
+            loader.close();
+        }
+        Runtime.getRuntime().halt(0);
+    }
+
+    static int invokeMain(ClassLoader loader, String mainClass, PrintStream err) {
+        try {
+            Method main = Class.forName(mainClass, true, loader).getMethod("main", String[].class);
+            main.invoke(null, (Object) new String[0]);
+            return 0;
+        } catch (InvocationTargetException e) {
+            return reportFailure(e.getCause(), err);
+        } catch (Throwable e) {
+            return reportFailure(e, err);
+        }
+    }
+
+    static int reportFailure(Throwable failure, PrintStream err) {
+        for (Throwable t = failure; t != null; t = t.getCause()) {
+            if (t instanceof ExitTrap) {
+                return ((ExitTrap) t).status;
+            }
+        }
+        // Same message and exit code the JVM uses for an uncaught exception
+        err.print("Exception in thread \"main\" ");
+        failure.printStackTrace(err);
+        return 1;
+    }
+
+    @SuppressWarnings("removal")
+    static void installExitTrap() {
+        try {
+            System.setSecurityManager(new SecurityManager() {
+                @Override
+                public void checkPermission(Permission perm) {
+                }
+
+                @Override
+                public void checkPermission(Permission perm, Object context) {
+                }
+
+                @Override
+                public void checkExit(int status) {
+                    if (trapExit) {
+                        throw new ExitTrap(status);
+                    }
+                }
+            });
+        } catch (UnsupportedOperationException | SecurityException e) {
+            // Security managers are no longer available; System.exit() ends the harness.
+        }
+    }
+
+    static void readInputs(InputStream in, long defaultTimeout, List<byte[]> inputs, List<Long> timeouts,
+            List<byte[]> expected) throws Exception {
+        BufferedReader reader = new BufferedReader(new InputStreamReader(in, StandardCharsets.US_ASCII));
+        int count = Integer.parseInt(reader.readLine().trim());
+        for (int i = 0; i < count; i++) {
+            String line = reader.readLine();
+            String[] fields = line == null ? new String[] {"-"} : line.trim().split(" ");
+            inputs.add(fields[0].equals("-") ? new byte[0] : Base64.getDecoder().decode(fields[0]));
+            timeouts.add(fields.length > 1 ? Long.parseLong(fields[1]) : defaultTimeout);
+            expected.add(fields.length > 2 && !fields[2].equals("-") ? Base64.getDecoder().decode(fields[2]) : null);
+        }
+    }
+
+    static int indexOf(byte[] data, int length, byte[] needle, int from) {
+        search:
+        for (int i = from; i <= length - needle.length; i++) {
+            for (int j = 0; j < needle.length; j++) {
+                if (data[i + j] != needle[j]) {
+                    continue search;
+                }
+            }
+            return i;
+        }
+        return -1;
+    }
+
+    static String encode(byte[] data) {
+        return data.length == 0 ? "-" : Base64.getEncoder().encodeToString(data);
+    }
+}
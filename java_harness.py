@@ -0,0 +1,127 @@
+import base64
+import hashlib
+import os
+import re
+import subprocess
+import threading
+
+from executor import StreamResult, run_streaming
+
+# Runs all test cases of a student in one warm JVM using harness/GraderHarness.java.
+# The harness is compiled once into the grader cache and reused for every student.
+
+HARNESS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "harness")
+
+_build_lock = threading.Lock()
+_java_version = None
+
+def java_version():
+    """Major version of the `java` on PATH (8, 11, 17, ...), or None if it can't be run."""
+    global _java_version
+    if _java_version is None:
+        try:
+            result = subprocess.run(["java", "-version"], capture_output=True, text=True, timeout=30)
+            match = re.search(r'version "(\d+)(?:\.(\d+))?', result.stderr)
+        except (OSError, subprocess.TimeoutExpired):
+            match = None
+        if match is None:
+            _java_version = 0
+        else:
+            major = int(match.group(1))
+            # Java 8 and older report themselves as "1.x"
+            _java_version = int(match.group(2) or 0) if major == 1 else major
+    return _java_version or None
+
+def build_harness(cache_dir, timeout):
+    """
+    Compiles the Java helpers in harness/ (the test harness and the compile
+    server) into cache_dir, once per version of their sources.
+    Returns the directory with the compiled classes, or None if javac failed.
+    """
+    sources = sorted(os.path.join(HARNESS_DIR, f) for f in os.listdir(HARNESS_DIR) if f.endswith(".java"))
+    digest = hashlib.sha1()
+    for source in sources:
+        with open(source, "rb") as f:
+            digest.update(f.read())
+    class_dir = os.path.join(cache_dir, "harness", digest.hexdigest()[:12])
+    marker = os.path.join(class_dir, ".built")
+    with _build_lock:
+        if os.path.exists(marker):
+            return class_dir
+        os.makedirs(class_dir, exist_ok=True)
+        try:
+            result = subprocess.run(["javac", "-d", class_dir] + sources,
+                                    capture_output=True, text=True, timeout=timeout)
+        except (OSError, subprocess.TimeoutExpired):
+            return None
+        if result.returncode != 0:
+            print(f"⚠️ Could not compile the Java helpers in {HARNESS_DIR}.\n{result.stderr}")
+            return None
+        open(marker, "w").close()
+    return class_dir
+
+def harness_command(harness_dir, clone_path, main_class, timeout, max_output, java_flags=()):
+    command = ["java"] + list(java_flags)
+    version = java_version()
+    if version is not None and 18 <= version < 24:
+        # Needed for the harness to trap System.exit(); removed in JDK 24.
+        command.append("-Djava.security.manager=allow")
+    command += ["-cp", harness_dir, "GraderHarness", clone_path, main_class, str(int(timeout * 1000)), str(max_output)]
+    return command
+
+def run_in_harness(harness_dir, clone_path, main_class, tests, timeout, max_output, java_flags=(), wrap=None):
+    """
+    Runs the tests for one student in a single JVM.
+    Returns one result per test that the harness finished, in test order:
+    an executor.StreamResult, or "Timeout". A test is stopped as soon as its
+    output goes past max_output bytes (stopped="output_limit"). A test whose
+    output contains its "expected" text may still return until its timeout,
+    so the JVM is reused for the next test; only a program still running then
+    is stopped (stopped="match") instead of timing out.
+    The list stops early after a stopped test, a timeout, or when the program
+    ended the JVM, so callers run the remaining tests themselves. java_flags
+    and wrap (see sandbox.Limits.applied) apply the same resource limits as
+    for a single test process. The harness runs in its own process group,
+    which is killed when it is done. A test with a "timeout" (seconds) gets
+    that instead of timeout.
+    """
+    command = harness_command(harness_dir, clone_path, main_class, timeout, max_output, java_flags)
+    if wrap is not None:
+        command = wrap(command)
+    stdin_lines = [str(len(tests))]
+    for test in tests:
+        fields = []
+        for text in (test["input"], test.get("expected") or ""):
+            data = text.encode("utf-8")
+            fields.append(base64.b64encode(data).decode("ascii") if data else "-")
+        stdin_lines.append(f"{fields[0]} {int(test.get('timeout', timeout) * 1000)} {fields[1]}")
+
+    # Each result line carries up to max_output bytes of stdout and of stderr, Base64 encoded
+    result_bytes = len(tests) * (3 * max_output + 256)
+    try:
+        result = run_streaming(command, clone_path, "\n".join(stdin_lines) + "\n",
+                               sum(test.get("timeout", timeout) for test in tests) + timeout,
+                               result_bytes)
+    except OSError:
+        return []
+    if result == "Timeout":
+        return []
+
+    results = []
+    for line in result.stdout.splitlines():
+        parts = line.split(" ")
+        if len(parts) < 3 or parts[0] != "@@RESULT" or parts[1] != str(len(results) + 1):
+            continue
+        if parts[2] == "TIMEOUT":
+            results.append("Timeout")
+            break
+        if len(parts) < 6:
+            break
+        out, err = (base64.b64decode(p).decode("utf-8", "replace") if p != "-" else "" for p in parts[4:6])
+        if parts[2] == "STOPPED":
+            # Same as a process killed early by run_streaming
+            results.append(StreamResult(command, -9, out, err, stopped=parts[3],
+                                        truncated=parts[3] == "output_limit"))
+            break
+        results.append(StreamResult(command, int(parts[3]), out, err))
+    return results
@@ -0,0 +1,141 @@
+import base64
+import hashlib
+import json
+import os
+import shutil
+import subprocess
+import tempfile
+import threading
+import time
+
+from java_harness import java_version
+
+# Fast-start profile for the many short-lived JVMs the grader launches.
+# Once per JDK a Class Data Sharing archive is dumped with the JDK classes
+# that workshop programs and the test harness load. Every student JVM then
+# maps that archive and runs with C1 only, the serial GC and a small heap.
+#
+# The archive records the class path it was built with, so student JVMs must
+# put the harness directory first on their class path to use it.
+
+MIN_JAVA_VERSION = 11
+
+WARMUP_SOURCE = """import java.util.Scanner;
+
+public class CdsWarmup {
+    public static void main(String[] args) {
+        Scanner scanner = new Scanner(System.in);
+        double a = scanner.nextDouble();
+        String line = scanner.next();
+        long total = 0;
+        for (char c : line.toCharArray()) {
+            total += Character.getNumericValue(c);
+        }
+        System.out.println("Difference: " + (a - total));
+        System.out.printf("%.2f%n", a);
+        System.out.println(String.format("%s %d", line.trim(), total) + Math.abs(-1) + Integer.parseInt("7"));
+    }
+}
+"""
+WARMUP_INPUT = "25.5\n4003600000000014\n"
+
+FAST_START_FLAGS = ["-XX:TieredStopAtLevel=1", "-XX:+UseSerialGC", "-XX:-UsePerfData", "-Xshare:auto",
+                    # CDS warnings would otherwise go to stdout, mixed into the program's output
+                    "-Xlog:disable", "-Xlog:all=warning:stderr"]
+
+# Only the compiler's own JVM start is tuned for javac
+JAVAC_FLAGS = ["-J-XX:TieredStopAtLevel=1", "-J-XX:+UseSerialGC", "-J-XX:-UsePerfData", "-J-Xshare:auto"]
+
+_lock = threading.Lock()
+_profile = None
+
+def _jdk_key(harness_dir):
+    """Identifies the JDK on PATH (version and location) together with the harness build."""
+    result = subprocess.run(["java", "-XshowSettings:properties", "-version"], capture_output=True, text=True, timeout=30)
+    return hashlib.sha1((result.stderr + harness_dir).encode("utf-8")).hexdigest()[:16]
+
+def _time_launches(command, runs, timeout):
+    """Average wall time in ms of running command, or None if it fails."""
+    total = 0.0
+    for _ in range(runs):
+        start = time.perf_counter()
+        result = subprocess.run(command, input=WARMUP_INPUT, capture_output=True, text=True, timeout=timeout)
+        total += time.perf_counter() - start
+        if result.returncode != 0 or "Difference" not in result.stdout:
+            return None
+    return total / runs * 1000
+
+def _build(cache_dir, harness_dir, timeout):
+    try:
+        archive_dir = os.path.join(cache_dir, "cds", _jdk_key(harness_dir))
+    except (OSError, subprocess.SubprocessError):
+        return None
+    archive = os.path.join(archive_dir, "grader.jsa")
+    meta_path = os.path.join(archive_dir, "meta.json")
+    if os.path.exists(meta_path):
+        with open(meta_path, "r", encoding="utf-8") as f:
+            return json.load(f)
+
+    os.makedirs(archive_dir, exist_ok=True)
+    sample_dir = tempfile.mkdtemp(prefix="cds_warmup_")
+    try:
+        with open(os.path.join(sample_dir, "CdsWarmup.java"), "w", encoding="utf-8") as f:
+            f.write(WARMUP_SOURCE)
+        subprocess.run(["javac", "-d", sample_dir, os.path.join(sample_dir, "CdsWarmup.java")],
+                       check=True, capture_output=True, timeout=timeout)
+        run_sample = ["-cp", harness_dir, "GraderHarness", sample_dir, "CdsWarmup", str(timeout * 1000)]
+        harness_input = f"1\n{base64.b64encode(WARMUP_INPUT.encode('utf-8')).decode('ascii')}\n"
+
+        # 1. Record the classes a typical test run loads, 2. dump them into an archive
+        class_list = os.path.join(archive_dir, "classes.lst")
+        subprocess.run(["java", f"-XX:DumpLoadedClassList={class_list}"] + run_sample,
+                       input=harness_input, check=True, capture_output=True, text=True, timeout=timeout)
+        subprocess.run(["java", "-Xshare:dump", f"-XX:SharedClassListFile={class_list}",
+                        f"-XX:SharedArchiveFile={archive}", "-cp", harness_dir],
+                       check=True, capture_output=True, text=True, timeout=timeout * 4)
+
+        # 3. Measure what it buys per launch with the warmup program run directly
+        plain = ["java", "-cp", harness_dir + os.pathsep + sample_dir, "CdsWarmup"]
+        fast = ["java"] + FAST_START_FLAGS + [f"-XX:SharedArchiveFile={archive}"] + plain[1:]
+        baseline_ms = _time_launches(plain, 3, timeout)
+        fast_ms = _time_launches(fast, 3, timeout)
+    except (OSError, subprocess.SubprocessError):
+        shutil.rmtree(archive_dir, ignore_errors=True)
+        return None
+    finally:
+        shutil.rmtree(sample_dir, ignore_errors=True)
+    if fast_ms is None:
+        # The JVM rejected the flags or the archive; don't use them.
+        shutil.rmtree(archive_dir, ignore_errors=True)
+        return None
+
+    meta = {"archive": archive, "baseline_ms": baseline_ms, "fast_ms": fast_ms}
+    with open(meta_path, "w", encoding="utf-8") as f:
+        json.dump(meta, f)
+    return meta
+
+def fast_start_profile(cache_dir, harness_dir, timeout):
+    """
+    Returns (java flags, javac flags) for fast JVM startup. The CDS archive
+    is built on first use for the JDK on PATH. Falls back to ([], []) when
+    the JDK is too old or the archive can't be built.
+    """
+    global _profile
+    with _lock:
+        if _profile is not None:
+            return _profile
+        version = java_version()
+        if version is None or version < MIN_JAVA_VERSION or harness_dir is None:
+            print(f"⚠️ Fast JVM start needs JDK {MIN_JAVA_VERSION}+ and the harness, using default JVM flags.")
+            _profile = ([], [])
+            return _profile
+        meta = _build(cache_dir, harness_dir, timeout)
+        if meta is None:
+            print("⚠️ Could not build the shared class archive, using default JVM flags.")
+            _profile = ([], [])
+            return _profile
+        if meta["baseline_ms"] is not None:
+            print(f"Fast JVM start: {meta['fast_ms']:.0f} ms per launch instead of {meta['baseline_ms']:.0f} ms "
+                  f"({meta['baseline_ms'] - meta['fast_ms']:.0f} ms saved, JDK {version}).")
+        _profile = (FAST_START_FLAGS + [f"-XX:SharedArchiveFile={meta['archive']}"], JAVAC_FLAGS)
+        return _profile
@@ -0,0 +1,19 @@
+import importlib
+
+# Stand-in for a module that is imported the first time one of its attributes
+# is used, so commands that never touch pandas, openpyxl or requests don't pay
+# for importing them.
+
+class LazyModule:
+    def __init__(self, name):
+        self._name = name
+        self._module = None
+
+    def __getattr__(self, attr):
+        if self._module is None:
+            # import_module takes the import lock, so concurrent first uses are safe
+            self._module = importlib.import_module(self._name)
+        return getattr(self._module, attr)
+
+    def __repr__(self):
+        return f"<lazy module '{self._name}'>"
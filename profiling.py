@@ -0,0 +1,164 @@
+import contextlib
+import csv
+import json
+import os
+import threading
+import time
+
+try:
+    import resource  # not available on Windows
+except ImportError:
+    resource = None
+
+# Per-phase timing for grading runs.
+# Wrap work in `with phase("compile"):` and it is recorded for the student being
+# graded on this thread (or for the run itself outside of a student). Processes
+# started through executor.run_streaming() report their exact CPU time and peak
+# RSS; for anything else the phase falls back to getrusage(RUSAGE_CHILDREN),
+# which covers all children of the grader and is only approximate with --jobs > 1.
+
+_current = threading.local()
+
+def _children_usage():
+    """(CPU seconds, peak RSS in MB) of finished child processes so far."""
+    if resource is None:
+        return 0.0, 0.0
+    usage = resource.getrusage(resource.RUSAGE_CHILDREN)
+    # ru_maxrss is in kilobytes on Linux and in bytes on macOS
+    rss_mb = usage.ru_maxrss / (1024 * 1024) if os.uname().sysname == "Darwin" else usage.ru_maxrss / 1024
+    return usage.ru_utime + usage.ru_stime, rss_mb
+
+class RunProfile:
+    def __init__(self):
+        self.started_at = time.time()
+        self.finished_at = None
+        self.students = []
+        self.phases = []  # run level phases, e.g. workbook operations
+        self._lock = threading.Lock()
+
+    @contextlib.contextmanager
+    def student(self, name, **info):
+        """Collects the phases run on this thread while grading one student."""
+        record = dict(info, student=str(name), phases=[])
+        _current.record = record
+        start = time.perf_counter()
+        try:
+            yield record
+        finally:
+            record["wall"] = time.perf_counter() - start
+            _current.record = None
+            with self._lock:
+                self.students.append(record)
+
+    def add_phase(self, entry):
+        record = getattr(_current, "record", None)
+        if record is not None:
+            record["phases"].append(entry)
+        else:
+            with self._lock:
+                self.phases.append(entry)
+
+    def rows(self):
+        """One flat row per recorded phase, for CSV export."""
+        for entry in self.phases:
+            yield dict(entry, student="")
+        for record in self.students:
+            for entry in record["phases"]:
+                yield dict(entry, student=record["student"])
+
+    def save(self, path):
+        """Writes the profile as JSON to path and as CSV next to it."""
+        self.finished_at = self.finished_at or time.time()
+        data = {
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+            "wall": self.finished_at - self.started_at,
+            "phases": self.phases,
+            "students": self.students,
+        }
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(data, f, indent=2, ensure_ascii=False)
+        csv_path = os.path.splitext(path)[0] + ".csv"
+        with open(csv_path, "w", newline="", encoding="utf-8") as f:
+            writer = csv.DictWriter(f, fieldnames=["student", "phase", "test", "wall", "child_cpu", "peak_rss_mb"],
+                                    extrasaction="ignore")
+            writer.writeheader()
+            writer.writerows(self.rows())
+        return csv_path
+
+    def summary(self, top=5):
+        """Text summary of the slowest students and the time spent per phase."""
+        self.finished_at = self.finished_at or time.time()
+        lines = [f"Run took {self.finished_at - self.started_at:.1f}s for {len(self.students)} student(s)."]
+        slowest = sorted(self.students, key=lambda r: r["wall"], reverse=True)[:top]
+        if slowest:
+            lines.append("Slowest students:")
+            for record in slowest:
+                worst = max(record["phases"], key=lambda e: e["wall"], default=None)
+                worst_text = f" (mostly {worst['phase']}: {worst['wall']:.2f}s)" if worst else ""
+                lines.append(f"  {record['student']}: {record['wall']:.2f}s{worst_text}")
+
+        totals = {}
+        for entry in self.rows():
+            total = totals.setdefault(entry["phase"], [0, 0.0, 0.0])
+            total[0] += 1
+            total[1] += entry["wall"]
+            total[2] = max(total[2], entry["wall"])
+        if totals:
+            lines.append("Time per phase (count, total, max):")
+            for name, (count, total, longest) in sorted(totals.items(), key=lambda kv: kv[1][1], reverse=True):
+                lines.append(f"  {name}: {count}x, {total:.2f}s, max {longest:.2f}s")
+        return "\n".join(lines)
+
+# Set by the grader when profiling is enabled
+active_profile = None
+
+@contextlib.contextmanager
+def phase(name, **info):
+    """Times a block of work as `name` in the active profile, if there is one."""
+    if active_profile is None:
+        yield
+        return
+    cpu_before, _ = _children_usage()
+    children = _current.children = []
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        wall = time.perf_counter() - start
+        _current.children = None
+        if children:
+            # Exact numbers reported by the processes this phase ran
+            child_cpu, rss_mb = sum(c for c, _ in children), max(r for _, r in children)
+        else:
+            cpu_after, rss_mb = _children_usage()
+            child_cpu = cpu_after - cpu_before
+        entry = dict(info, phase=name, wall=round(wall, 4), child_cpu=round(child_cpu, 4),
+                     peak_rss_mb=round(rss_mb, 1))
+        active_profile.add_phase(entry)
+
+def record_child(cpu_seconds, peak_rss_mb):
+    """Reports the resource usage of one child process to the phase running on this thread."""
+    children = getattr(_current, "children", None)
+    if children is not None:
+        children.append((cpu_seconds, peak_rss_mb))
+
+def student(name, **info):
+    """Context for grading one student; a no-op when profiling is off."""
+    if active_profile is None:
+        return contextlib.nullcontext()
+    return active_profile.student(name, **info)
+
+def current_record():
+    """The student record this thread's phases go to, to hand to a helper thread."""
+    return getattr(_current, "record", None)
+
+@contextlib.contextmanager
+def attach(record):
+    """Records the phases run on this thread into record (see current_record)."""
+    previous = getattr(_current, "record", None)
+    _current.record = record
+    try:
+        yield
+    finally:
+        _current.record = previous
@@ -0,0 +1,10 @@
+import java.util.Scanner;
+
+public class Main {
+    public static void main(String[] args) {
+        Scanner scanner = new Scanner(System.in);
+        double first = scanner.nextDouble();
+        double second = scanner.nextDouble();
+        System.out.println("Difference: " + (first - second));
+    }
+}
@@ -0,0 +1,39 @@
+import java.util.Scanner;
+
+public class Main {
+    // Card numbers are read until 0 is entered
+    public static void main(String[] args) {
+        Scanner scanner = new Scanner(System.in);
+        while (scanner.hasNext()) {
+            String number = scanner.next().trim();
+            if (number.equals("0")) {
+                break;
+            }
+            System.out.println(isValid(number) ? "Valid Card" : "Invalid Card");
+        }
+    }
+
+    static boolean isValid(String number) {
+        if (number.length() < 13 || number.length() > 16 || !number.matches("\\d+")) {
+            return false;
+        }
+        if (!(number.startsWith("4") || number.startsWith("5") || number.startsWith("37")
+                || number.startsWith("6"))) {
+            return false;
+        }
+        int sum = 0;
+        boolean twice = false;
+        for (int i = number.length() - 1; i >= 0; i--) {
+            int digit = number.charAt(i) - '0';
+            if (twice) {
+                digit *= 2;
+                if (digit > 9) {
+                    digit -= 9;
+                }
+            }
+            sum += digit;
+            twice = !twice;
+        }
+        return sum % 10 == 0;
+    }
+}
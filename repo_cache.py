@@ -0,0 +1,121 @@
+import hashlib
+import os
+import shutil
+import subprocess
+import threading
+import time
+
+# Local mirror cache for student repositories.
+# The first time a repo is seen it is cloned once as a blobless mirror;
+# later runs only `git fetch` what changed and check it out as a worktree.
+# Mirrors that have not been used recently are evicted once the cache
+# grows past its size cap.
+
+def dir_size(path):
+    """Total size in bytes of all files below path."""
+    total = 0
+    for root, dirs, files in os.walk(path):
+        for fname in files:
+            try:
+                total += os.path.getsize(os.path.join(root, fname))
+            except OSError:
+                pass
+    return total
+
+def evict_lru(directory, max_bytes, keep=()):
+    """
+    Deletes the least recently used entries (files or folders) in directory
+    until their combined size is at most max_bytes.
+    Entries are ordered by modification time, so callers touch an entry
+    with os.utime() whenever it is used. Returns the evicted paths.
+    """
+    if not os.path.isdir(directory):
+        return []
+    entries = []
+    for name in os.listdir(directory):
+        path = os.path.join(directory, name)
+        size = dir_size(path) if os.path.isdir(path) else os.path.getsize(path)
+        entries.append((os.path.getmtime(path), size, path))
+
+    total = sum(size for _, size, _ in entries)
+    evicted = []
+    for _, size, path in sorted(entries):
+        if total <= max_bytes:
+            break
+        if path in keep:
+            continue
+        if os.path.isdir(path):
+            shutil.rmtree(path, ignore_errors=True)
+        else:
+            os.remove(path)
+        total -= size
+        evicted.append(path)
+    return evicted
+
+class RepoCache:
+    def __init__(self, cache_dir, max_bytes, timeout):
+        self.mirror_dir = os.path.join(cache_dir, "mirrors")
+        self.max_bytes = max_bytes
+        self.timeout = timeout
+        self._locks = {}
+        self._locks_guard = threading.Lock()
+        os.makedirs(self.mirror_dir, exist_ok=True)
+
+    def mirror_path(self, repo_url):
+        key = hashlib.sha1(repo_url.strip().encode("utf-8")).hexdigest()[:20]
+        return os.path.join(self.mirror_dir, key + ".git")
+
+    def _lock(self, path):
+        with self._locks_guard:
+            return self._locks.setdefault(path, threading.Lock())
+
+    def _git(self, args, cwd=None):
+        """Runs git and returns None on success, "Timeout", or an error message."""
+        try:
+            result = subprocess.run(["git"] + args, cwd=cwd, capture_output=True,
+                                    text=True, timeout=self.timeout)
+        except FileNotFoundError:
+            return "Git command failed."
+        except subprocess.TimeoutExpired:
+            return "Timeout"
+        if result.returncode != 0:
+            return result.stderr or "Git command failed."
+        return None
+
+    def _update_mirror(self, repo_url, mirror):
+        if os.path.isdir(mirror):
+            error = self._git(["fetch", "--prune", "--quiet"], cwd=mirror)
+            if error is None:
+                return None
+            # The mirror may be broken; clone it again from scratch and only
+            # replace the old one once the new clone succeeded.
+
+        partial = mirror + ".partial"
+        shutil.rmtree(partial, ignore_errors=True)
+        error = self._git(["clone", "--mirror", "--filter=blob:none", "--quiet", repo_url, partial])
+        if error is not None:
+            shutil.rmtree(partial, ignore_errors=True)
+            return error
+        shutil.rmtree(mirror, ignore_errors=True)
+        os.replace(partial, mirror)
+        return None
+
+    def checkout(self, repo_url, dest):
+        """
+        Makes the latest commit of repo_url available as a working tree at dest.
+        Returns None on success, "Timeout" if git timed out, or an error message.
+        """
+        mirror = self.mirror_path(repo_url)
+        with self._lock(mirror):
+            error = self._update_mirror(repo_url, mirror)
+            if error is not None:
+                return error
+            # Forget worktrees whose temporary directories are already gone.
+            self._git(["worktree", "prune"], cwd=mirror)
+            error = self._git(["worktree", "add", "--detach", "--quiet", dest, "HEAD"], cwd=mirror)
+            os.utime(mirror, (time.time(), time.time()))
+        return error
+
+    def evict(self):
+        """Evicts least recently used mirrors beyond the size cap."""
+        return evict_lru(self.mirror_dir, self.max_bytes)
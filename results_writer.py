@@ -0,0 +1,138 @@
+import os
+from openpyxl import Workbook, load_workbook
+from openpyxl.worksheet.datavalidation import DataValidation
+from openpyxl.styles import Font, Alignment, Border, Side
+from openpyxl.utils import get_column_letter
+
+# Writes grading results into the results workbook in a single load/save cycle:
+# merges the workshop status columns by student name, adds the status dropdown
+# and applies the formatting required by the college administration.
+
+STATUS_OPTIONS = '"⛔Absent,❌Incomplete,⚠️Partial Complete,✅Complete"'
+# Written next to the status when the results have them, e.g. "Workshop 3 Similarity"
+OPTIONAL_COLUMNS = ("Similarity",)
+
+# Shared style objects, openpyxl stores each distinct style only once
+FONT = Font(size=16)
+BOLD_FONT = Font(size=16, bold=True)
+ALIGN = Alignment(horizontal="center", vertical="center", wrap_text=False)
+THIN_BORDER = Border(
+    left=Side(style="thin"),
+    right=Side(style="thin"),
+    top=Side(style="thin"),
+    bottom=Side(style="thin")
+)
+
+def _is_blank(value):
+    return value is None or str(value).strip() == ""
+
+class ResultsWriter:
+    def __init__(self, file_path, name_column="Student Name"):
+        self.file_path = file_path
+        self.name_column = name_column
+        self.updated_sheets = {}  # sheet name -> set of status column indexes
+        if os.path.exists(file_path):
+            self.workbook = load_workbook(file_path)
+        else:
+            self.workbook = Workbook()
+            self.workbook.remove(self.workbook.active)
+
+    def _sheet(self, sheet_name):
+        if sheet_name not in self.workbook.sheetnames:
+            self.workbook.create_sheet(sheet_name)
+        return self.workbook[sheet_name]
+
+    def _column(self, ws, header, preferred=None):
+        """Finds the column with this header, or adds it (at `preferred` if that column is free)."""
+        last_used = 0
+        for cell in ws[1]:
+            if cell.value == header:
+                return cell.column
+            if not _is_blank(cell.value):
+                last_used = cell.column
+        if preferred is not None and _is_blank(ws.cell(row=1, column=preferred).value):
+            column = preferred
+        else:
+            column = last_used + 1
+        ws.cell(row=1, column=column, value=header)
+        return column
+
+    def update(self, sheet_name, workshop_number, results):
+        """
+        Writes "Workshop N Status" from each result into the row of its student,
+        and the optional columns that the results have. Students missing from
+        the sheet are appended. Rows without a student name are left alone.
+        """
+        ws = self._sheet(sheet_name)
+        name_col = self._column(ws, self.name_column, preferred=1)
+        # Column B is Workshop 1, C is Workshop 2, etc.
+        status_col = self._column(ws, f"Workshop {workshop_number} Status", preferred=workshop_number + 1)
+        optional_cols = {}
+        for suffix in OPTIONAL_COLUMNS:
+            header = f"Workshop {workshop_number} {suffix}"
+            if any(header in result for result in results):
+                optional_cols[header] = self._column(ws, header)
+
+        rows = {}
+        for row in range(2, ws.max_row + 1):
+            name = ws.cell(row=row, column=name_col).value
+            if not _is_blank(name):
+                rows.setdefault(str(name).strip(), row)
+
+        next_row = ws.max_row + 1
+        for result in results:
+            name = result[self.name_column]
+            if _is_blank(name):
+                continue
+            key = str(name).strip()
+            if key not in rows:
+                rows[key] = next_row
+                ws.cell(row=next_row, column=name_col, value=name)
+                next_row += 1
+            ws.cell(row=rows[key], column=status_col, value=result[f"Workshop {workshop_number} Status"])
+            for header, column in optional_cols.items():
+                if header in result:
+                    ws.cell(row=rows[key], column=column, value=result[header])
+
+        self.updated_sheets.setdefault(sheet_name, set()).add(status_col)
+
+    def _add_dropdown(self, ws, column):
+        """
+        Adds the status dropdown to a column, reusing the sheet's existing
+        status validation. The column's old range is replaced, so the range
+        doesn't grow on every save.
+        """
+        cell_range = f"{get_column_letter(column)}2:{get_column_letter(column)}{max(ws.max_row, 2)}"
+        for dv in ws.data_validations.dataValidation:
+            if dv.type == "list" and dv.formula1 == STATUS_OPTIONS:
+                for old in list(dv.sqref.ranges):
+                    if old.min_col == column and old.max_col == column:
+                        dv.sqref.remove(old)
+                dv.add(cell_range)
+                return
+        dropdown = DataValidation(type="list", formula1=STATUS_OPTIONS, allow_blank=True)
+        ws.add_data_validation(dropdown)
+        dropdown.add(cell_range)
+
+    def _format(self, ws):
+        """Font size 16, centered, bordered, bold header row, columns sized to their content."""
+        widths = {}
+        for row_idx, row in enumerate(ws.iter_rows(), start=1):
+            font = BOLD_FONT if row_idx == 1 else FONT
+            for cell in row:
+                cell.font = font
+                cell.alignment = ALIGN
+                cell.border = THIN_BORDER
+                if cell.value:
+                    widths[cell.column_letter] = max(widths.get(cell.column_letter, 0), len(str(cell.value)))
+        for col_letter, width in widths.items():
+            ws.column_dimensions[col_letter].width = width
+
+    def save(self):
+        """Adds dropdowns and formatting to every updated sheet and saves the workbook once."""
+        for sheet_name, status_columns in self.updated_sheets.items():
+            ws = self.workbook[sheet_name]
+            for column in sorted(status_columns):
+                self._add_dropdown(ws, column)
+            self._format(ws)
+        self.workbook.save(self.file_path)
@@ -0,0 +1,140 @@
+import difflib
+import unicodedata
+from collections import namedtuple
+
+import pandas as pd
+from openpyxl import load_workbook
+
+# Matching GitHub Classroom roster identifiers to the students of a
+# submissions sheet. Names are compared by a normalised key, so case, extra
+# whitespace, punctuation and accents don't matter, and a roll number in the
+# name (5 or more digits, e.g. "DOE JOHN 2301234") is matched on its own.
+# Identifiers without an exact match get the closest unclaimed name above
+# FUZZY_CUTOFF (names that appear in more than one row are left out), and what
+# still doesn't match is reported instead of being added as a new row.
+
+FUZZY_CUTOFF = 0.9
+
+_ROLL = r"(\d{5,})"
+
+Reconciliation = namedtuple("Reconciliation", ["changed", "fuzzy", "unmatched", "duplicates"])
+
+def _fold(text):
+    text = unicodedata.normalize("NFKD", text)
+    return "".join(c for c in text if not unicodedata.combining(c)).casefold()
+
+def normalize(names):
+    """DataFrame with the name `key` and `roll` number (or NaN) of each name in the Series."""
+    folded = names.fillna("").astype(str).map(_fold)
+    roll = folded.str.extract(_ROLL, expand=False)
+    key = (folded.str.replace(_ROLL, " ", regex=True)
+                 .str.replace(r"[^\w\s]|_", " ", regex=True)
+                 .str.split().str.join(" "))
+    return pd.DataFrame({"key": key, "roll": roll}, index=names.index)
+
+class RosterIndex:
+    def __init__(self, names):
+        """Indexes the names of a sheet, in row order. Positions are indexes into names."""
+        self.names = list(names)
+        frame = normalize(pd.Series(self.names, dtype=object))
+        frame = frame[frame["key"] != ""]
+        self._keys = frame["key"]
+        self._by_key = pd.Series(frame.index, index=frame["key"])
+        self._by_key = self._by_key[~self._by_key.index.duplicated()]
+        rolls = frame.dropna(subset=["roll"])
+        self._by_roll = pd.Series(rolls.index, index=rolls["roll"])
+        self._by_roll = self._by_roll[~self._by_roll.index.duplicated()]
+        self._rolls = frame["roll"]
+        self.duplicates = [self.names[i] for i in frame.index[frame.duplicated(["key", "roll"], keep="first")]]
+        # Names shared by several rows are never guessed at
+        self._shared_keys = set(frame["key"][frame["key"].duplicated(keep=False)])
+
+    def match(self, identifiers):
+        """
+        Matches roster identifiers to sheet positions. Returns a list with a
+        (position, how) per identifier, where how is "roll", "exact" or
+        "fuzzy", or (None, None) if nothing matched.
+        """
+        query = normalize(pd.Series(list(identifiers), dtype=object))
+        found = query["roll"].map(self._by_roll)
+        how = pd.Series(None, index=query.index, dtype=object).mask(found.notna(), "roll")
+
+        by_key = query["key"].map(self._by_key)
+        # Same name but a different roll number is a different student
+        sheet_roll = by_key.map(self._rolls)
+        conflict = query["roll"].notna() & sheet_roll.notna() & (query["roll"] != sheet_roll)
+        by_key = by_key.mask(conflict)
+        how = how.mask(found.isna() & by_key.notna(), "exact")
+        found = found.fillna(by_key)
+
+        claimed = set(found.dropna().astype(int))
+        open_keys = {key: pos for pos, key in self._keys.items()
+                     if pos not in claimed and key not in self._shared_keys}
+        for i in query.index[found.isna() & (query["key"] != "")]:
+            close = difflib.get_close_matches(query.at[i, "key"], list(open_keys), n=1, cutoff=FUZZY_CUTOFF)
+            if close:
+                found.at[i] = open_keys.pop(close[0])
+                how.at[i] = "fuzzy"
+
+        return [(None, None) if pd.isna(pos) else (int(pos), kind) for pos, kind in zip(found, how)]
+
+    def find(self, name):
+        """Position of the student with this name (or a close one), or None."""
+        return self.match([name])[0][0]
+
+class SubmissionsUpdater:
+    def __init__(self, file_path, name_column="Student Name"):
+        self.file_path = file_path
+        self.name_column = name_column
+        self.workbook = load_workbook(file_path)
+        self.changed = False
+
+    def update(self, sheet_name, column_header, classroom):
+        """
+        Writes the repo URLs of a Classroom export (a DataFrame with
+        roster_identifier and student_repository_url) into column_header of the
+        students' rows. Only cells whose value changes are written. Returns a
+        Reconciliation with the number of changed cells, the fuzzy matches as
+        (identifier, sheet name), the unmatched identifiers and the duplicate
+        names (in the sheet, or matched by more than one identifier).
+        """
+        ws = self.workbook[sheet_name]
+        headers = {cell.value: cell.column for cell in ws[1] if cell.value is not None}
+        name_col = headers.get(self.name_column)
+        if name_col is None:
+            raise KeyError(f"No '{self.name_column}' column in sheet '{sheet_name}'")
+        url_col = headers.get(column_header)
+        if url_col is None:
+            url_col = max(headers.values()) + 1
+            ws.cell(row=1, column=url_col, value=column_header)
+            self.changed = True
+
+        rows = list(range(2, ws.max_row + 1))
+        index = RosterIndex(ws.cell(row=row, column=name_col).value for row in rows)
+
+        classroom = classroom.dropna(subset=["roster_identifier", "student_repository_url"])
+        identifiers = classroom["roster_identifier"].astype(str).str.strip()
+        urls = classroom["student_repository_url"].astype(str).str.strip()
+        changed, fuzzy, unmatched, duplicates = 0, [], [], list(index.duplicates)
+        seen = set()
+        for identifier, url, (pos, how) in zip(identifiers, urls, index.match(identifiers)):
+            if pos is None:
+                unmatched.append(identifier)
+                continue
+            if pos in seen:
+                duplicates.append(identifier)
+                continue
+            seen.add(pos)
+            if how == "fuzzy":
+                fuzzy.append((identifier, index.names[pos]))
+            cell = ws.cell(row=rows[pos], column=url_col)
+            if cell.value != url:
+                cell.value = url
+                changed += 1
+        self.changed = self.changed or changed > 0
+        return Reconciliation(changed, fuzzy, unmatched, duplicates)
+
+    def save(self):
+        """Saves the workbook if anything was written."""
+        if self.changed:
+            self.workbook.save(self.file_path)
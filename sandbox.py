@@ -0,0 +1,256 @@
+import itertools
+import os
+import shutil
+import signal
+import threading
+import time
+from contextlib import contextmanager
+
+# Resource limits for student programs on plain Linux (no containers).
+# Each student process gets rlimits for CPU seconds, address space and file
+# size, is pinned to the least busy CPU of the grader's CPU budget, and the JVM
+# is started with a small heap and few threads. Violations are reported as their
+# own statuses instead of "Runtime Error".
+#
+# The limits are applied by wrapping the command (prlimit and taskset from
+# util-linux, or the shell's ulimit elsewhere) instead of a preexec_fn, which
+# isn't safe in the grader's many threads. RLIMIT_NPROC counts every process
+# of the user, so one fork bomb would use up the processes of all students
+# graded at the same time. Where the grader's cgroup v2 is delegated to it,
+# each job gets its own cgroup with pids.max instead. Otherwise the rlimit is
+# the user's current number of processes and threads plus the job's allowance.
+
+CPU_LIMIT_EXCEEDED = "CPU Limit Exceeded"
+MEMORY_LIMIT_EXCEEDED = "Memory Limit Exceeded"
+PROCESS_LIMIT_EXCEEDED = "Process Limit Exceeded"
+FILE_LIMIT_EXCEEDED = "File Size Limit Exceeded"
+
+MB = 1024 * 1024
+
+class Limits:
+    def __init__(self, cpu_seconds, memory_mb, max_processes, max_file_mb, heap_mb):
+        self.cpu_seconds = cpu_seconds
+        self.memory_mb = memory_mb
+        self.max_processes = max_processes
+        self.max_file_mb = max_file_mb
+        self.heap_mb = heap_mb
+
+    def jvm_flags(self):
+        """JVM options that keep one student's JVM small and single-core."""
+        flags = [f"-Xmx{self.heap_mb}m", "-XX:+UseSerialGC", "-XX:ActiveProcessorCount=1"]
+        if self.memory_mb:
+            # The JVM reserves a lot of address space up front; shrink the big
+            # reservations so it still starts under the address space limit.
+            flags += ["-XX:CompressedClassSpaceSize=64m", "-XX:ReservedCodeCacheSize=64m",
+                      "-XX:MaxMetaspaceSize=128m"]
+        return flags
+
+    @contextmanager
+    def applied(self, cpus=None):
+        """
+        Yields a function that turns a command into one running under the
+        limits, pinned to cpus. Processes of a job that has its own cgroup
+        are killed when the block ends.
+        """
+        cgroup = _pids_cgroups.create(self.max_processes) if self.max_processes else None
+
+        def wrap(command):
+            return self._wrap(command, cpus, cgroup)
+
+        try:
+            yield wrap
+        finally:
+            if cgroup is not None:
+                _pids_cgroups.remove(cgroup)
+
+    def _wrap(self, command, cpus, cgroup):
+        if os.name == "nt":
+            return list(command)
+        prefix = []
+        if cgroup is not None:
+            # The shell moves itself into the job's cgroup, then becomes the command
+            prefix += ["sh", "-c", 'echo $$ > "$0"; exec "$@"', os.path.join(cgroup, "cgroup.procs")]
+        max_processes = None
+        if self.max_processes and cgroup is None:
+            current = user_tasks()
+            max_processes = None if current is None else current + self.max_processes
+        if _tool("prlimit"):
+            options = []
+            if self.cpu_seconds:
+                # SIGXCPU at the soft limit, SIGKILL one second later
+                options.append(f"--cpu={self.cpu_seconds}:{self.cpu_seconds + 1}")
+            if self.memory_mb:
+                options.append(f"--as={self.memory_mb * MB}")
+            if max_processes:
+                options.append(f"--nproc={max_processes}")
+            if self.max_file_mb:
+                options.append(f"--fsize={self.max_file_mb * MB}")
+            if options:
+                prefix += ["prlimit"] + options
+        else:
+            ulimits = []
+            if self.cpu_seconds:
+                ulimits += [f"-H -t {self.cpu_seconds + 1}", f"-S -t {self.cpu_seconds}"]
+            if self.memory_mb:
+                ulimits.append(f"-v {self.memory_mb * 1024}")  # KiB
+            if max_processes:
+                ulimits.append(f"-u {max_processes}")
+            if self.max_file_mb:
+                ulimits.append(f"-f {self.max_file_mb * 2048}")  # 512-byte blocks
+            if ulimits:
+                script = "".join(f"ulimit {u} 2>/dev/null; " for u in ulimits) + 'exec "$@"'
+                prefix += ["sh", "-c", script, "sh"]
+        if cpus and _tool("taskset"):
+            prefix += ["taskset", "-c", ",".join(str(cpu) for cpu in sorted(cpus))]
+        return prefix + list(command)
+
+_tools = {}
+
+def _tool(name):
+    if name not in _tools:
+        _tools[name] = shutil.which(name)
+    return _tools[name]
+
+def user_tasks():
+    """Processes and threads of the current user (what RLIMIT_NPROC counts), or None if unknown."""
+    if not os.path.isdir("/proc/self/task"):
+        return None
+    uid = os.getuid()
+    total = 0
+    for entry in os.scandir("/proc"):
+        if not entry.name.isdigit():
+            continue
+        try:
+            if entry.stat().st_uid == uid:
+                total += len(os.listdir(os.path.join(entry.path, "task")))
+        except OSError:
+            pass  # the process ended meanwhile
+    return total
+
+class PidsCgroups:
+    """
+    Per-job cgroups with pids.max, below the cgroup v2 the grader runs in.
+    Only used when that cgroup is delegated to the user (e.g. started with
+    `systemd-run --user --scope -p Delegate=yes`) and has the pids controller.
+    """
+
+    def __init__(self):
+        self._base = None
+        self._ready = False
+        self._lock = threading.Lock()
+        self._ids = itertools.count(1)
+
+    def _setup(self):
+        """The directory of the grader's cgroup with pids enabled for its children, or None."""
+        mount = None
+        with open("/proc/self/mountinfo", "r", encoding="utf-8") as f:
+            for line in f:
+                if " - cgroup2 " in line:
+                    mount = line.split()[4]
+                    break
+        with open("/proc/self/cgroup", "r", encoding="utf-8") as f:
+            own = next((line.strip()[3:] for line in f if line.startswith("0::")), None)
+        if mount is None or own is None:
+            return None
+        base = os.path.join(mount, own.lstrip("/"))
+        with open(os.path.join(base, "cgroup.controllers"), "r", encoding="utf-8") as f:
+            if "pids" not in f.read().split():
+                return None
+        if not os.access(os.path.join(base, "cgroup.procs"), os.W_OK):
+            return None
+        # A cgroup with processes in it can't hand controllers to its children,
+        # so the grader moves into a child of its own first.
+        grader = os.path.join(base, "grader")
+        os.makedirs(grader, exist_ok=True)
+        with open(os.path.join(grader, "cgroup.procs"), "w", encoding="utf-8") as f:
+            f.write(str(os.getpid()))
+        with open(os.path.join(base, "cgroup.subtree_control"), "w", encoding="utf-8") as f:
+            f.write("+pids")
+        return base
+
+    def create(self, max_pids):
+        """A new job cgroup allowing max_pids processes and threads, or None without cgroup v2."""
+        with self._lock:
+            if not self._ready:
+                self._ready = True
+                try:
+                    self._base = self._setup()
+                except (OSError, StopIteration):
+                    self._base = None
+            if self._base is None:
+                return None
+        path = os.path.join(self._base, f"job-{os.getpid()}-{next(self._ids)}")
+        try:
+            os.mkdir(path)
+            with open(os.path.join(path, "pids.max"), "w", encoding="utf-8") as f:
+                f.write(str(max_pids))
+        except OSError:
+            self.remove(path)
+            return None
+        return path
+
+    def remove(self, path):
+        """Kills whatever still runs in a job cgroup and deletes it."""
+        for _ in range(50):
+            try:
+                os.rmdir(path)
+                return
+            except FileNotFoundError:
+                return
+            except OSError:
+                pass
+            try:
+                if os.path.exists(os.path.join(path, "cgroup.kill")):
+                    with open(os.path.join(path, "cgroup.kill"), "w", encoding="utf-8") as f:
+                        f.write("1")
+                else:
+                    with open(os.path.join(path, "cgroup.procs"), "r", encoding="utf-8") as f:
+                        for pid in f.read().split():
+                            os.kill(int(pid), signal.SIGKILL)
+            except (OSError, ValueError):
+                pass
+            time.sleep(0.02)
+
+_pids_cgroups = PidsCgroups()
+
+class CpuBudget:
+    """Hands out CPUs from a fixed set, always the one with the fewest running jobs."""
+
+    def __init__(self, size=None):
+        if hasattr(os, "sched_getaffinity"):
+            available = sorted(os.sched_getaffinity(0))
+        else:
+            available = list(range(os.cpu_count() or 1))
+        self.cpus = available[:size] if size else available
+        self._running = {cpu: 0 for cpu in self.cpus}
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def acquire(self):
+        with self._lock:
+            cpu = min(self.cpus, key=lambda c: self._running[c])
+            self._running[cpu] += 1
+        try:
+            yield {cpu}
+        finally:
+            with self._lock:
+                self._running[cpu] -= 1
+
+def classify_violation(returncode, stderr):
+    """Limit status for a failed student process, or None if no limit was hit."""
+    stderr = stderr or ""
+    if returncode is not None and returncode < 0:
+        signum = -returncode
+        if signum == getattr(signal, "SIGXCPU", None):
+            return CPU_LIMIT_EXCEEDED
+        if signum == getattr(signal, "SIGXFSZ", None):
+            return FILE_LIMIT_EXCEEDED
+    if "unable to create native thread" in stderr or "unable to create new native thread" in stderr \
+            or "error=11, Resource temporarily unavailable" in stderr:
+        return PROCESS_LIMIT_EXCEEDED
+    if "OutOfMemoryError" in stderr or "Could not reserve enough space" in stderr \
+            or "insufficient memory for the Java Runtime" in stderr:
+        return MEMORY_LIMIT_EXCEEDED
+    if "File too large" in stderr:
+        return FILE_LIMIT_EXCEEDED
+    return None
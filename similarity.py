@@ -0,0 +1,162 @@
+import os
+import re
+import zlib
+from collections import defaultdict
+
+import numpy as np
+import pandas as pd
+
+# Similarity detection between submissions without comparing every pair.
+# Java sources are reduced to a token stream in which identifiers, literals,
+# comments and whitespace no longer matter, so renaming variables or
+# reformatting doesn't hide a copy. Each submission's k-token shingles are
+# summarised in a MinHash signature, and locality sensitive hashing (LSH) over
+# bands of the signatures yields the candidate pairs. Signatures are cached per
+# source hash (grade_cache.source_key):
+#
+#   <cache dir>/<source key>.npy   MinHash signature (empty if too short)
+#   <cache dir>/commits/<sha>      source key of a graded commit
+
+SHINGLE_TOKENS = 5
+NUM_PERM = 128
+BANDS = 32  # 4 rows per band, pairs above ~0.45 similarity usually share a bucket
+MIN_TOKENS = 50  # shorter submissions (e.g. Hello World) are all alike
+SEED = 1
+
+_MASK32 = np.uint64(0xFFFFFFFF)
+
+_TOKEN = re.compile(r"""
+    (?P<comment>//[^\n]*|/\*.*?\*/)
+  | (?P<string>"(?:\\.|[^"\\\n])*"|'(?:\\.|[^'\\\n])*')
+  | (?P<number>\d[\w.]*)
+  | (?P<word>[A-Za-z_$][\w$]*)
+  | (?P<symbol>[^\s\w])
+""", re.DOTALL | re.VERBOSE)
+
+JAVA_KEYWORDS = frozenset("""
+    abstract assert boolean break byte case catch char class const continue default do double else enum
+    extends final finally float for goto if implements import instanceof int interface long native new
+    package private protected public return short static strictfp super switch synchronized this throw
+    throws transient try void volatile while var record yield true false null
+""".split())
+
+def tokenize(source):
+    """Normalised tokens of Java source: keywords and symbols, with ID/NUM/STR for everything else."""
+    tokens = []
+    for match in _TOKEN.finditer(source):
+        kind = match.lastgroup
+        if kind == "comment":
+            continue
+        if kind == "word":
+            word = match.group()
+            tokens.append(word if word in JAVA_KEYWORDS else "ID")
+        elif kind == "string":
+            tokens.append("STR")
+        elif kind == "number":
+            tokens.append("NUM")
+        else:
+            tokens.append(match.group())
+    return tokens
+
+def _permutations(num_perm, seed):
+    rng = np.random.default_rng(seed)
+    a = rng.integers(0, np.iinfo(np.uint64).max, size=num_perm, dtype=np.uint64, endpoint=True) | np.uint64(1)
+    b = rng.integers(0, np.iinfo(np.uint64).max, size=num_perm, dtype=np.uint64, endpoint=True)
+    return a, b
+
+_A, _B = _permutations(NUM_PERM, SEED)
+
+def minhash(tokens, k=SHINGLE_TOKENS):
+    """MinHash signature of the k-token shingles, or an empty array for fewer than MIN_TOKENS tokens."""
+    if len(tokens) < max(MIN_TOKENS, k):
+        return np.empty(0, dtype=np.uint64)
+    ids = np.array([zlib.crc32(t.encode("utf-8")) for t in tokens], dtype=np.uint64)
+    # Combine k consecutive token hashes into one 32-bit shingle hash (uint64 arithmetic wraps)
+    shingles = np.zeros(len(ids) - k + 1, dtype=np.uint64)
+    for offset in range(k):
+        shingles = shingles * np.uint64(1000003) ^ ids[offset:len(ids) - k + 1 + offset]
+    shingles = np.unique(shingles & _MASK32)
+    # Multiply-shift hashing: the high 32 bits of (a * x + b) mod 2**64 for odd a
+    return ((_A[:, None] * shingles[None, :] + _B[:, None]) >> np.uint64(32)).min(axis=1)
+
+class FingerprintStore:
+    def __init__(self, cache_dir):
+        self.cache_dir = cache_dir
+        os.makedirs(os.path.join(cache_dir, "commits"), exist_ok=True)
+
+    def signature(self, src_key, java_files=None):
+        """
+        Signature of the submission with this source key, computed from
+        java_files if it isn't cached yet. None if it is unknown.
+        """
+        path = os.path.join(self.cache_dir, src_key + ".npy")
+        if os.path.exists(path):
+            return np.load(path)
+        if java_files is None:
+            return None
+        tokens = []
+        for java_file in sorted(java_files):
+            with open(java_file, "r", encoding="utf-8", errors="replace") as f:
+                tokens += tokenize(f.read())
+        signature = minhash(tokens)
+        partial = f"{path}.{os.getpid()}.partial.npy"
+        np.save(partial, signature)
+        os.replace(partial, path)
+        return signature
+
+    def link(self, commit_sha, src_key):
+        """Remembers which sources a commit has, so it can be compared again without a clone."""
+        with open(os.path.join(self.cache_dir, "commits", commit_sha), "w", encoding="utf-8") as f:
+            f.write(src_key)
+
+    def for_commit(self, commit_sha):
+        """Signature of a graded commit, or None."""
+        try:
+            with open(os.path.join(self.cache_dir, "commits", commit_sha), "r", encoding="utf-8") as f:
+                return self.signature(f.read().strip())
+        except OSError:
+            return None
+
+def similar_pairs(signatures, threshold):
+    """
+    Pairs of keys whose signatures are at least `threshold` similar, as
+    (key_a, key_b, similarity), most similar first. Only pairs that share an
+    LSH bucket are compared.
+    """
+    keys = [key for key, sig in signatures.items() if sig is not None and len(sig) == NUM_PERM]
+    if len(keys) < 2:
+        return []
+    matrix = np.stack([signatures[key] for key in keys])
+    rows = NUM_PERM // BANDS
+    candidates = set()
+    for band in range(BANDS):
+        buckets = defaultdict(list)
+        for index, chunk in enumerate(matrix[:, band * rows:(band + 1) * rows]):
+            buckets[chunk.tobytes()].append(index)
+        for members in buckets.values():
+            for i, first in enumerate(members):
+                candidates.update((first, second) for second in members[i + 1:])
+
+    pairs = []
+    for first, second in candidates:
+        score = float(np.mean(matrix[first] == matrix[second]))
+        if score >= threshold:
+            pairs.append((keys[first], keys[second], round(score, 3)))
+    pairs.sort(key=lambda p: (-p[2], str(p[0]), str(p[1])))
+    return pairs
+
+def write_report(pairs, path):
+    """Writes the pairs of (section, student) keys as a ranked CSV."""
+    pd.DataFrame(
+        [(rank, a[1], a[0], b[1], b[0], score) for rank, (a, b, score) in enumerate(pairs, start=1)],
+        columns=["Rank", "Student A", "Section A", "Student B", "Section B", "Similarity"]
+    ).to_csv(path, index=False)
+
+def best_matches(pairs):
+    """For each key in a pair, its most similar other key and the similarity."""
+    best = {}
+    for a, b, score in pairs:
+        for key, other in ((a, b), (b, a)):
+            if key not in best or score > best[key][1]:
+                best[key] = (other, score)
+    return best
@@ -0,0 +1,77 @@
+import os
+import re
+from collections import namedtuple
+
+# One pass over a student's repository that finds the .java sources and the
+# classes with a main method. Build output and VCS directories are pruned, and
+# only the first HEADER_BYTES of each source are read to look for
+# `package ...;` and `main`. Main classes are ranked so that the class a
+# workshop expects, or the conventional `Main`, wins over leftover exercises
+# and test drivers.
+
+SKIP_DIRS = {".git", "out", "bin", "target"}
+# Larger .java files are still compiled, but not searched for main (generated code)
+MAX_SOURCE_BYTES = 1024 * 1024
+HEADER_BYTES = 64 * 1024
+# Score lead that makes the best main class certain (the bonus for being called Main)
+CLEAR_LEAD = 10
+
+_PACKAGE = re.compile(rb"^\s*package\s+([\w.]+)\s*;", re.MULTILINE)
+_MAIN = re.compile(rb"(?:public\s+static|static\s+public)\s+(?:final\s+)?void\s+main\s*\(\s*(?:final\s+)?"
+                   rb"String\s*(?:\[\s*\]\s*\w+|\.\.\.\s*\w+|\w+\s*\[\s*\])\s*\)")
+_TEST_NAME = re.compile(r"test", re.IGNORECASE)
+
+MainCandidate = namedtuple("MainCandidate", ["class_name", "path", "score"])
+
+def _score(class_name, rel_path, expected_main):
+    simple_name = class_name.rsplit(".", 1)[-1]
+    score = 0
+    if expected_main and expected_main in (class_name, simple_name):
+        score += 100
+    if simple_name == "Main":
+        score += 10
+    parts = rel_path.replace(os.sep, "/").split("/")
+    if "src" in parts:
+        score += 3
+    if _TEST_NAME.search(rel_path):
+        score -= 20
+    # Prefer sources near the top of the repository
+    return score - len(parts)
+
+def scan_sources(root, expected_main=None):
+    """
+    Walks root once. Returns (java_files, candidates): every .java file outside
+    of build output and .git, and a MainCandidate for each class with a main
+    method, best first. expected_main is the (simple or qualified) class name
+    the workshop asks for, if any.
+    """
+    java_files = []
+    candidates = []
+    for dirpath, dirnames, filenames in os.walk(root):
+        dirnames[:] = sorted(d for d in dirnames if d not in SKIP_DIRS)
+        for fname in sorted(filenames):
+            if not fname.endswith(".java"):
+                continue
+            path = os.path.join(dirpath, fname)
+            java_files.append(path)
+            try:
+                if os.path.getsize(path) > MAX_SOURCE_BYTES:
+                    continue
+                with open(path, "rb") as f:
+                    header = f.read(HEADER_BYTES)
+            except OSError:
+                continue
+            if not _MAIN.search(header):
+                continue
+            class_name = fname[:-len(".java")]
+            package = _PACKAGE.search(header)
+            if package:
+                class_name = package.group(1).decode("ascii", "replace") + "." + class_name
+            rel_path = os.path.relpath(path, root)
+            candidates.append(MainCandidate(class_name, path, _score(class_name, rel_path, expected_main)))
+    candidates.sort(key=lambda c: -c.score)
+    return java_files, candidates
+
+def is_ambiguous(candidates):
+    """True when no main class clearly outranks the next one (by being expected or called Main)."""
+    return len(candidates) > 1 and candidates[0].score - candidates[1].score < CLEAR_LEAD
@@ -0,0 +1,112 @@
+import hashlib
+import json
+import os
+import re
+
+# The test plan is workshop_inputs.json after validation: every workshop's
+# task, tests, reference solution (resolved against the JSON file's directory)
+# and expected main class. The compiled plan is stored as JSON in the cache
+# with the JSON file's mtime and size, so later runs load it without
+# validating again until the file changes. It is plain data, so a cache on a
+# shared mount can't be used to run code on the graders:
+#
+#   <cache dir>/<hash of the JSON path>.json
+
+PLAN_VERSION = 3
+
+_CLASS_NAME = re.compile(r"^[A-Za-z_$][\w$]*(\.[A-Za-z_$][\w$]*)*$")
+
+class TestPlanError(Exception):
+    pass
+
+def check_workshops(data, base_dir):
+    """Problems with the contents of a workshop inputs file, as messages. Empty if it is valid."""
+    if not isinstance(data, dict):
+        return ["The file must map workshop numbers to workshops."]
+    errors = []
+    for workshop, spec in data.items():
+        where = f"Workshop {workshop}"
+        if not str(workshop).isdigit():
+            errors.append(f"{where}: the key must be a workshop number.")
+        if not isinstance(spec, dict):
+            errors.append(f"{where}: expected an object with 'tests'.")
+            continue
+        tests = spec.get("tests", [])
+        if not isinstance(tests, list):
+            errors.append(f"{where}: 'tests' must be a list.")
+            tests = []
+        for number, test in enumerate(tests, start=1):
+            if not isinstance(test, dict):
+                errors.append(f"{where}, test {number}: expected an object with 'input'.")
+                continue
+            if not isinstance(test.get("input"), str):
+                errors.append(f"{where}, test {number}: 'input' must be a string.")
+            # Without an expected output the program's output is only recorded
+            if test.get("expected") is not None and not isinstance(test["expected"], str):
+                errors.append(f"{where}, test {number}: 'expected' must be a string.")
+            timeout = test.get("timeout")
+            if timeout is not None and (isinstance(timeout, bool) or not isinstance(timeout, (int, float))
+                                        or timeout <= 0):
+                errors.append(f"{where}, test {number}: 'timeout' must be a positive number of seconds.")
+        reference = spec.get("reference")
+        if reference is not None and not os.path.isdir(os.path.join(base_dir, str(reference))):
+            errors.append(f"{where}: reference solution '{reference}' is not a directory.")
+        main_class = spec.get("main_class")
+        if main_class is not None and not _CLASS_NAME.match(str(main_class)):
+            errors.append(f"{where}: '{main_class}' is not a Java class name.")
+    return errors
+
+def compile_plan(data, base_dir):
+    """{workshop: {"task", "tests", "reference", "main_class"}} from validated workshop inputs."""
+    plan = {}
+    for workshop, spec in data.items():
+        reference = spec.get("reference")
+        plan[str(workshop)] = {
+            "task": spec.get("task", ""),
+            "tests": [{key: test[key] for key in ("input", "expected", "timeout") if key in test}
+                      for test in spec.get("tests", [])],
+            "reference": None if reference is None else os.path.normpath(os.path.join(base_dir, reference)),
+            "main_class": spec.get("main_class"),
+        }
+    return plan
+
+def read_plan(path):
+    """Parses, validates and compiles a workshop inputs file. Raises TestPlanError if it is invalid."""
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+    except (OSError, ValueError) as e:
+        raise TestPlanError(f"Could not read '{path}': {e}")
+    base_dir = os.path.dirname(os.path.abspath(path))
+    errors = check_workshops(data, base_dir)
+    if errors:
+        raise TestPlanError("\n".join(errors))
+    return compile_plan(data, base_dir)
+
+def load_plan(path, cache_dir):
+    """The compiled plan of a workshop inputs file, from the cache unless the file changed."""
+    path = os.path.abspath(path)
+    try:
+        stat = os.stat(path)
+    except OSError as e:
+        raise TestPlanError(f"Could not read '{path}': {e}")
+    stamp = [PLAN_VERSION, path, stat.st_mtime_ns, stat.st_size]
+    cache_path = os.path.join(cache_dir, hashlib.sha1(path.encode("utf-8")).hexdigest()[:16] + ".json")
+    try:
+        with open(cache_path, "r", encoding="utf-8") as f:
+            cached = json.load(f)
+        if cached["stamp"] == stamp:
+            return cached["plan"]
+    except (OSError, ValueError, KeyError, TypeError):
+        pass
+
+    plan = read_plan(path)
+    try:
+        os.makedirs(cache_dir, exist_ok=True)
+        partial = f"{cache_path}.{os.getpid()}.partial"
+        with open(partial, "w", encoding="utf-8") as f:
+            json.dump({"stamp": stamp, "plan": plan}, f, ensure_ascii=False)
+        os.replace(partial, cache_path)
+    except OSError:
+        pass  # the plan still works, it is only compiled again next time
+    return plan
@@ -0,0 +1,76 @@
+import json
+import os
+import sys
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import download_repo
+
+# fetch_assignment_grades against a local stub of the Classroom grades API:
+# 250 grades in pages of 100, with ETags, and a 429 on the first request for
+# page 2.
+
+GRADES = [{"roster_identifier": f"student {i}", "student_repository_url": f"https://example.com/r{i}"}
+          for i in range(250)]
+LAST_PAGE = 3
+
+class StubGitHub(BaseHTTPRequestHandler):
+    calls = []
+    rate_limited = set()
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        page = int(parse_qs(url.query)["page"][0])
+        etag = f'"page-{page}"'
+        self.calls.append((page, self.headers.get("If-None-Match")))
+        if page == 2 and page not in self.rate_limited:
+            self.rate_limited.add(page)
+            self._reply(429, b"", {"Retry-After": "0"})
+        elif self.headers.get("If-None-Match") == etag:
+            self._reply(304, b"", {"ETag": etag})
+        else:
+            base = f"http://{self.headers['Host']}{url.path}?per_page=100"
+            link = f'<{base}&page={page + 1}>; rel="next", <{base}&page={LAST_PAGE}>; rel="last"'
+            body = json.dumps(GRADES[(page - 1) * 100:page * 100]).encode("utf-8")
+            self._reply(200, body, {"ETag": etag, "Link": link if page < LAST_PAGE else "",
+                                    "Content-Type": "application/json"})
+
+    def _reply(self, status, body, headers):
+        self.send_response(status)
+        for name, value in headers.items():
+            self.send_header(name, value)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+@pytest.fixture
+def github(tmp_path, monkeypatch):
+    StubGitHub.calls = []
+    StubGitHub.rate_limited = set()
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StubGitHub)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    monkeypatch.setattr(download_repo, "GITHUB_API_URL", f"http://127.0.0.1:{server.server_port}")
+    monkeypatch.setattr(download_repo, "HTTP_CACHE_DIR", str(tmp_path / "http"))
+    yield StubGitHub
+    server.shutdown()
+    server.server_close()
+
+def test_pages_follow_the_link_header_and_retry_after(github):
+    grades = download_repo.fetch_assignment_grades("42", "token")
+    assert grades == GRADES
+    pages = [page for page, _ in github.calls]
+    assert sorted(pages) == [1, 2, 2, 3]  # page 2 again after its 429
+
+def test_unchanged_pages_are_served_from_the_cache(github):
+    download_repo.fetch_assignment_grades("42", "token")
+    github.calls.clear()
+    assert download_repo.fetch_assignment_grades("42", "token") == GRADES
+    assert sorted(github.calls) == [(1, '"page-1"'), (2, '"page-2"'), (3, '"page-3"')]
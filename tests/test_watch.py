@@ -0,0 +1,41 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from watch import ChangeTracker
+
+# ChangeTracker.due with explicit clock values instead of real time.
+
+def test_new_head_waits_for_the_debounce():
+    tracker = ChangeTracker(debounce=20)
+    assert tracker.due({"ann": "a1"}, {"ann": "a0"}, now=0) == []
+    assert tracker.waiting() == 1
+    assert tracker.due({"ann": "a1"}, {"ann": "a0"}, now=19) == []
+    assert tracker.due({"ann": "a1"}, {"ann": "a0"}, now=20) == ["ann"]
+
+def test_another_push_restarts_the_debounce():
+    tracker = ChangeTracker(debounce=20)
+    tracker.due({"ann": "a1"}, {}, now=0)
+    assert tracker.due({"ann": "a2"}, {}, now=15) == []
+    assert tracker.due({"ann": "a2"}, {}, now=30) == []
+    assert tracker.due({"ann": "a2"}, {}, now=35) == ["ann"]
+
+def test_graded_head_is_not_due():
+    tracker = ChangeTracker(debounce=0)
+    assert tracker.due({"ann": "a1", "bob": None}, {"ann": "a1", "bob": "b1"}, now=0) == []
+    assert tracker.waiting() == 0
+
+def test_head_is_not_graded_twice_without_a_commit():
+    # A clone error is recorded without a commit, so graded never catches up with the head
+    tracker = ChangeTracker(debounce=0)
+    assert tracker.due({"ann": "a1"}, {"ann": None}, now=0) == ["ann"]
+    tracker.mark_graded("ann", "a1")
+    assert tracker.waiting() == 0
+    assert tracker.due({"ann": "a1"}, {"ann": None}, now=10) == []
+    assert tracker.due({"ann": "a2"}, {"ann": None}, now=20) == ["ann"]
+
+def test_student_without_a_result_is_due():
+    tracker = ChangeTracker(debounce=5)
+    assert tracker.due({"ann": "a1"}, {}, now=0) == []
+    assert tracker.due({"ann": "a1"}, {}, now=5) == ["ann"]
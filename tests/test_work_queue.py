@@ -0,0 +1,92 @@
+import multiprocessing
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from work_queue import MAX_ATTEMPTS, WorkQueue
+
+# Several worker processes sharing one queue file, like workers on several
+# machines sharing a mount.
+
+def _entries(count):
+    return [(f"student {i}", f"https://example.com/repo{i}", [{"input": "", "expected": "x"}], 1, "1")
+            for i in range(count)]
+
+def _drain(path, worker, claimed):
+    queue = WorkQueue(path)
+    while True:
+        job = queue.claim(worker)
+        if job is None:
+            break
+        claimed.put((job["id"], worker))
+        queue.complete(job["id"], worker, "✅Complete", "✅Complete", "", "abc", "")
+    queue.close()
+
+def _claim_and_crash(path, worker, lease_seconds, claimed):
+    queue = WorkQueue(path, lease_seconds)
+    job = queue.claim(worker)
+    claimed.put(None if job is None else (job["id"], job["worker"], job["attempts"]))
+    queue.close()
+
+def _run(target, *args):
+    process = multiprocessing.Process(target=target, args=args)
+    process.start()
+    process.join(30)
+    assert process.exitcode == 0
+
+def test_each_job_is_claimed_once(tmp_path):
+    path = str(tmp_path / "queue.db")
+    queue = WorkQueue(path)
+    run_id = queue.enqueue(_entries(40))
+    claimed = multiprocessing.Queue()
+    workers = [multiprocessing.Process(target=_drain, args=(path, f"w{n}", claimed)) for n in range(4)]
+    for process in workers:
+        process.start()
+    for process in workers:
+        process.join(60)
+        assert process.exitcode == 0
+
+    ids = [claimed.get(timeout=5)[0] for _ in range(40)]
+    assert claimed.empty()
+    assert sorted(ids) == sorted(set(ids))
+    assert queue.progress(run_id) == {"done": 40}
+    assert [job["student"] for job in queue.finished(run_id)] == [f"student {i}" for i in range(40)]
+    queue.close()
+
+def test_expired_lease_is_retried_then_failed(tmp_path):
+    path = str(tmp_path / "queue.db")
+    lease = 1.0
+    queue = WorkQueue(path, lease)
+    run_id = queue.enqueue(_entries(1))
+    claimed = multiprocessing.Queue()
+
+    for attempt in range(1, MAX_ATTEMPTS + 1):
+        _run(_claim_and_crash, path, f"w{attempt}", lease, claimed)
+        job_id, worker, attempts = claimed.get(timeout=5)
+        assert (worker, attempts) == (f"w{attempt}", attempt)
+        # Still leased until the lease runs out
+        _run(_claim_and_crash, path, "other", lease, claimed)
+        assert claimed.get(timeout=5) is None
+        time.sleep(lease + 0.1)
+
+    _run(_claim_and_crash, path, "late", lease, claimed)
+    assert claimed.get(timeout=5) is None
+    assert queue.progress(run_id) == {"failed": 1}
+    assert queue.heartbeat([job_id], f"w{MAX_ATTEMPTS}") == [job_id]
+    queue.close()
+
+def test_released_job_is_claimed_again_right_away(tmp_path):
+    path = str(tmp_path / "queue.db")
+    queue = WorkQueue(path, 60)
+    run_id = queue.enqueue(_entries(1))
+    for attempt in range(1, MAX_ATTEMPTS + 1):
+        job = queue.claim(f"w{attempt}")
+        assert job["attempts"] == attempt
+        queue.release(job["id"], "someone else")  # only the holder of the lease can release it
+        assert queue.claim("other") is None
+        queue.release(job["id"], f"w{attempt}")
+    assert queue.claim("late") is None
+    assert queue.progress(run_id) == {"failed": 1}
+    queue.close()
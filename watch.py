@@ -0,0 +1,43 @@
+import time
+
+# Change detection for watch mode (grade_java_projects.py --watch).
+# Each poll compares every student's remote HEAD (git ls-remote) with the
+# commit graded last. A changed repository is graded once its HEAD has stayed
+# the same for `debounce` seconds, so a student pushing several commits in a
+# row is graded once, on the last one.
+
+class ChangeTracker:
+    def __init__(self, debounce):
+        self.debounce = debounce
+        self._pending = {}  # student -> (remote HEAD, when it was first seen)
+        self._attempted = {}  # student -> remote HEAD graded during this watch
+
+    def due(self, heads, graded, now=None):
+        """
+        Students to grade now. heads maps each student to their remote HEAD
+        (None if ls-remote failed), graded to the commit of their latest
+        result (None if it had no commit, e.g. the clone failed).
+        """
+        now = time.monotonic() if now is None else now
+        ready = []
+        for student, head in heads.items():
+            if student in graded and (head is None or head == graded[student]):
+                self._pending.pop(student, None)
+                continue
+            if student in self._attempted and self._attempted[student] == head:
+                continue  # graded this HEAD already and it had no commit SHA (clone error)
+            sha, since = self._pending.get(student, (None, None))
+            if since is None or sha != head:
+                self._pending[student] = (head, now)
+                since = now
+            if now - since >= self.debounce:
+                ready.append(student)
+        return ready
+
+    def mark_graded(self, student, head):
+        self._pending.pop(student, None)
+        self._attempted[student] = head
+
+    def waiting(self):
+        """Number of changed repositories still inside their debounce window."""
+        return len(self._pending)
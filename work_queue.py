@@ -0,0 +1,162 @@
+import json
+import sqlite3
+import threading
+import time
+import uuid
+
+# Job queue for grading on several machines, in a SQLite file on a shared mount.
+# The coordinator enqueues one job per student and waits for the results;
+# workers claim jobs with a lease that they renew with heartbeats while
+# grading. A job whose lease runs out (the worker crashed or lost the mount)
+# goes back to the queue, up to MAX_ATTEMPTS claims. A job that failed with an
+# error on the worker goes back right away.
+#
+# Network file systems don't support SQLite's WAL mode, so the queue uses the
+# default rollback journal and short write transactions.
+
+MAX_ATTEMPTS = 3
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    run_id TEXT NOT NULL,
+    seq INTEGER NOT NULL,
+    section TEXT,
+    workshop INTEGER NOT NULL,
+    student TEXT NOT NULL,
+    repo_url TEXT,
+    tests TEXT NOT NULL,
+    state TEXT NOT NULL DEFAULT 'queued',
+    worker TEXT,
+    lease_until REAL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    commit_sha TEXT,
+    status TEXT,
+    final_status TEXT,
+    details TEXT,
+    output TEXT,
+    started_at REAL,
+    finished_at REAL
+);
+CREATE INDEX IF NOT EXISTS jobs_state ON jobs (state, lease_until);
+CREATE INDEX IF NOT EXISTS jobs_run ON jobs (run_id, seq);
+"""
+
+class WorkQueue:
+    def __init__(self, path, lease_seconds=120):
+        self.path = path
+        self.lease_seconds = lease_seconds
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, timeout=60, isolation_level=None, check_same_thread=False)
+        self._db.row_factory = sqlite3.Row
+        self._db.executescript(SCHEMA)
+
+    def _write(self, sql, params=()):
+        with self._lock:
+            return self._db.execute(sql, params)
+
+    def _fail_expired(self, now):
+        """Gives up on jobs whose last allowed lease ran out."""
+        self._db.execute(
+            "UPDATE jobs SET state = 'failed', worker = NULL WHERE state = 'leased' AND lease_until < ?"
+            " AND attempts >= ?", (now, MAX_ATTEMPTS))
+
+    def enqueue(self, entries):
+        """
+        Adds (student, repo URL, tests, workshop, section) entries as one run.
+        Returns the run ID.
+        """
+        run_id = uuid.uuid4().hex[:12]
+        rows = [(run_id, seq, None if section is None else str(section), int(workshop), str(student),
+                 None if repo_url is None or repo_url != repo_url else str(repo_url),  # NaN -> None
+                 json.dumps(tests, ensure_ascii=False))
+                for seq, (student, repo_url, tests, workshop, section) in enumerate(entries)]
+        with self._lock:
+            self._db.execute("BEGIN IMMEDIATE")
+            self._db.executemany(
+                "INSERT INTO jobs (run_id, seq, section, workshop, student, repo_url, tests)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?)", rows)
+            self._db.execute("COMMIT")
+        return run_id
+
+    def claim(self, worker):
+        """Leases the oldest available job to worker. Returns it as a dict, or None."""
+        now = time.time()
+        with self._lock:
+            self._db.execute("BEGIN IMMEDIATE")
+            try:
+                self._fail_expired(now)
+                row = self._db.execute(
+                    "SELECT * FROM jobs WHERE state = 'queued' OR (state = 'leased' AND lease_until < ?)"
+                    " ORDER BY id LIMIT 1", (now,)).fetchone()
+                if row is not None:
+                    self._db.execute(
+                        "UPDATE jobs SET state = 'leased', worker = ?, lease_until = ?, attempts = attempts + 1,"
+                        " started_at = ? WHERE id = ?", (worker, now + self.lease_seconds, now, row["id"]))
+                self._db.execute("COMMIT")
+            except BaseException:
+                self._db.execute("ROLLBACK")
+                raise
+        if row is None:
+            return None
+        job = dict(row)
+        job.update(state="leased", worker=worker, lease_until=now + self.lease_seconds,
+                   attempts=row["attempts"] + 1, started_at=now)
+        job["tests"] = json.loads(job["tests"])
+        return job
+
+    def heartbeat(self, job_ids, worker):
+        """Extends the leases worker still holds on job_ids. Returns the IDs it lost."""
+        if not job_ids:
+            return []
+        lost = []
+        for job_id in job_ids:
+            cursor = self._write(
+                "UPDATE jobs SET lease_until = ? WHERE id = ? AND worker = ? AND state = 'leased'",
+                (time.time() + self.lease_seconds, job_id, worker))
+            if cursor.rowcount == 0:
+                lost.append(job_id)
+        return lost
+
+    def release(self, job_id, worker):
+        """
+        Hands a job worker could not grade back to the queue right away, or
+        gives up on it after MAX_ATTEMPTS claims.
+        """
+        self._write(
+            "UPDATE jobs SET state = CASE WHEN attempts >= ? THEN 'failed' ELSE 'queued' END, worker = NULL,"
+            " lease_until = NULL WHERE id = ? AND worker = ? AND state = 'leased'", (MAX_ATTEMPTS, job_id, worker))
+
+    def fail_unfinished(self, run_id):
+        """Gives up on the jobs of a run that are still queued or leased."""
+        self._write("UPDATE jobs SET state = 'failed', worker = NULL WHERE run_id = ? AND state IN ('queued', 'leased')",
+                    (run_id,))
+
+    def complete(self, job_id, worker, status, final_status, details, commit_sha, output):
+        """Stores the result of a job. The first result posted for a job wins."""
+        self._write(
+            "UPDATE jobs SET state = 'done', worker = ?, status = ?, final_status = ?, details = ?, commit_sha = ?,"
+            " output = ?, finished_at = ? WHERE id = ? AND state != 'done'",
+            (worker, status, final_status, details, commit_sha, output, time.time(), job_id))
+
+    def progress(self, run_id):
+        """{state: number of jobs} for a run, with leases that ran out counted as queued."""
+        now = time.time()
+        with self._lock:
+            self._fail_expired(now)
+            rows = self._db.execute(
+                "SELECT CASE WHEN state = 'leased' AND lease_until < ? THEN 'queued' ELSE state END AS s,"
+                " COUNT(*) AS n FROM jobs WHERE run_id = ? GROUP BY s", (now, run_id)).fetchall()
+        return {row["s"]: row["n"] for row in rows}
+
+    def finished(self, run_id):
+        """Finished ('done' and 'failed') jobs of a run, in the order they were enqueued."""
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT * FROM jobs WHERE run_id = ? AND state IN ('done', 'failed') ORDER BY seq",
+                (run_id,)).fetchall()
+        return [dict(row) for row in rows]
+
+    def close(self):
+        with self._lock:
+            self._db.close()